@@ -0,0 +1,61 @@
+"""
+Shared model loading for the CSE training scenarios.
+Loading a SentenceTransformer pays the full PyTorch + weights cold start,
+so every scenario goes through get_model() and reuses the same instance.
+"""
+
+import os
+from functools import lru_cache
+
+# One thread per physical core; hyperthreads oversubscribe the encode matmuls.
+# The env vars must be set before torch spins up its OpenMP/MKL pools.
+PHYSICAL_CORES = max(1, (os.cpu_count() or 2) // 2)
+os.environ.setdefault("OMP_NUM_THREADS", str(PHYSICAL_CORES))
+os.environ.setdefault("MKL_NUM_THREADS", str(PHYSICAL_CORES))
+
+import torch
+from sentence_transformers import SentenceTransformer
+
+torch.set_num_threads(PHYSICAL_CORES)
+torch.set_num_interop_threads(1)
+torch.backends.mkldnn.enabled = True
+
+# int8 ONNX export shipped with the sentence-transformers hub models; ONNX
+# Runtime comes from the sentence-transformers[onnx] extra
+QUANTIZED_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def best_device():
+    """Pick the fastest available torch device: CUDA, then Apple MPS, then CPU."""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+@lru_cache(maxsize=None)
+def get_model(name, quantize=False, device=None):
+    """
+    Return a memoized SentenceTransformer for the given model name.
+    The device defaults to best_device(). With quantize=True on CPU the int8
+    ONNX export is loaded on ONNX Runtime, falling back to PyTorch when the
+    model has no such export.
+    """
+    device = device or best_device()
+    if quantize and device == "cpu":
+        try:
+            return SentenceTransformer(
+                name, device="cpu", backend="onnx", model_kwargs={"file_name": QUANTIZED_ONNX_FILE}
+            )
+        except Exception as e:
+            print(f"Quantized ONNX model unavailable for {name}, using PyTorch: {e}")
+    return SentenceTransformer(name, device=device)
+
+
+def embedding_dimension(model):
+    """Read a model's output dimension without running a forward pass."""
+    get_dimension = getattr(model, "get_sentence_embedding_dimension", None)
+    if get_dimension is not None:
+        return get_dimension()
+    return model.encode("").shape[0]
@@ -2,58 +2,81 @@
 """
 CSE Training: The Dimension Apocalypse
 This demonstrates the #1 customer integration failure.
+
+torch and sentence-transformers are imported only once TRANSFORMER is known
+to be set. Profile startup with:
+    PYTHONPYCACHEPREFIX=/tmp/pycache python -X importtime dimension_apocolypse.py
 """
 
-import numpy as np
-from sentence_transformers import SentenceTransformer
-import json
 import os
+import sys
 from dotenv import load_dotenv
 
+_RULE = "=" * 60
+
+_UPGRADE_BANNER = f"""
+{_RULE}
+📅 THREE WEEKS LATER...
+Customer decides to 'upgrade' to better model
+{_RULE}
+"""
+
+_CUSTOMER_IMPACT = """
+🚨 CUSTOMER IMPACT:
+   - Cannot add new vectors to existing index
+   - Cannot query with new model embeddings
+   - Must delete entire index and start over
+   - Loses all existing data and configurations
+   - Downtime during re-indexing
+"""
+
+_QUIZ_BANNER = f"""
+{_RULE}
+CSE DIAGNOSTIC QUESTION TIME
+{_RULE}
+"""
+
 load_dotenv()
 MODEL=os.getenv("TRANSFORMER")
 # Simulate customer's initial setup - everything works great!
 print("=== CUSTOMER'S INITIAL SETUP (Works Fine) ===")
 
+if not MODEL:
+    sys.exit("❌ Set TRANSFORMER in your .env to the customer's starting model")
+
+# _models first: it pins OMP/MKL threads, which must be set before torch loads
+from _models import embedding_dimension, get_model
+import torch
 
 # Customer starts with a small model
-model_small = SentenceTransformer(MODEL)# 384 dimensions
+model_small = get_model(MODEL, quantize=True)# 384 dimensions
 sample_text = "This is a test document"
 
-# Generate embeddings
-embedding_small = model_small.encode(sample_text)
-print(f"Small model dimensions: {embedding_small.shape[0]}")
-print(f"Sample embedding (first 5 values): {embedding_small[:5]}")
-
-# Customer creates Pinecone index for 384 dimensions
-print(f"\n✅ Created Pinecone index with {embedding_small.shape[0]} dimensions")
-print("✅ Uploaded 1000 documents successfully")
-print("✅ Queries working perfectly")
-
-print("\n" + "="*60)
-print("📅 THREE WEEKS LATER...")
-print("Customer decides to 'upgrade' to better model")
-print("="*60)
+# Generate embeddings (the dimension itself is stored on the model)
+dim_small = embedding_dimension(model_small)
+with torch.inference_mode():
+    embedding_small = model_small.encode(sample_text)
+sys.stdout.write(
+    f"Small model dimensions: {dim_small}\n"
+    f"Sample embedding (first 5 values): {embedding_small[:5]}\n"
+    # Customer creates Pinecone index for 384 dimensions
+    f"\n✅ Created Pinecone index with {dim_small} dimensions\n"
+    "✅ Uploaded 1000 documents successfully\n"
+    "✅ Queries working perfectly\n"
+    + _UPGRADE_BANNER
+)
 
 # Customer finds a "better" model (this is where disaster strikes)
-model_large = SentenceTransformer('all-mpnet-base-v2')  # 768 dimensions
-embedding_large = model_large.encode(sample_text)
-
-print(f"\n🔥 NEW MODEL DIMENSIONS: {embedding_large.shape[0]}")
-print(f"🔥 EXISTING INDEX DIMENSIONS: {embedding_small.shape[0]}")
+model_large = get_model('all-mpnet-base-v2', quantize=True)  # 768 dimensions
+dim_large = embedding_dimension(model_large)
 
 # Show the mismatch
-dimension_mismatch = embedding_large.shape[0] != embedding_small.shape[0]
-print(f"\n💥 DIMENSION MISMATCH DETECTED: {dimension_mismatch}")
-
-if dimension_mismatch:
-    print("\n🚨 CUSTOMER IMPACT:")
-    print("   - Cannot add new vectors to existing index")
-    print("   - Cannot query with new model embeddings") 
-    print("   - Must delete entire index and start over")
-    print("   - Loses all existing data and configurations")
-    print("   - Downtime during re-indexing")
-
-print("\n" + "="*60)
-print("CSE DIAGNOSTIC QUESTION TIME")
-print("="*60)
\ No newline at end of file
+dimension_mismatch = dim_large != dim_small
+
+sys.stdout.write(
+    f"\n🔥 NEW MODEL DIMENSIONS: {dim_large}\n"
+    f"🔥 EXISTING INDEX DIMENSIONS: {dim_small}\n"
+    f"\n💥 DIMENSION MISMATCH DETECTED: {dimension_mismatch}\n"
+    + (_CUSTOMER_IMPACT if dimension_mismatch else "")
+    + _QUIZ_BANNER
+)
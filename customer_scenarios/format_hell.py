@@ -4,23 +4,51 @@ CSE Training: Format Hell
 The numpy → JSON → Pinecone data shuttling nightmare
 """
 
+import sys
+import time
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import json
+import orjson
+import pyarrow as pa
+from _models import get_model
+
+_RULE = "=" * 60
+
+_QUIZ_BANNER = f"""
+{_RULE}
+CSE DIAGNOSTIC SCENARIOS
+{_RULE}
+"""
+
+
+def sanitize(emb: np.ndarray) -> np.ndarray:
+    """Replace NaN/Inf with 0.0 in a single branchless pass over the batch."""
+    return np.where(np.isfinite(emb), emb, 0.0).astype(np.float32, copy=False)
+
+
+def to_wire(emb: np.ndarray) -> bytes:
+    """Serialize an embedding as raw little-endian float32 bytes."""
+    return np.ascontiguousarray(emb, dtype="<f4").tobytes()
+
+
+def from_wire(b: bytes) -> np.ndarray:
+    """View raw little-endian float32 bytes as an embedding without copying."""
+    return np.frombuffer(b, dtype="<f4")
+
 
 print("=== FORMAT HELL: The Data Conversion Nightmare ===")
 
 # Customer generates embeddings (this part works)
-model = SentenceTransformer('all-MiniLM-L6-v2')
+model = get_model('all-MiniLM-L6-v2', quantize=True)
 text = "Customer support document"
 embedding = model.encode(text)
 
-print(f"✅ Generated embedding: {type(embedding)}")
-print(f"✅ Shape: {embedding.shape}")
-print(f"✅ First 3 values: {embedding[:3]}")
-
-print(f"\n🔥 PROBLEM: Pinecone needs Python lists, not numpy arrays")
-print(f"Customer tries to upsert numpy array directly...")
+sys.stdout.write(
+    f"✅ Generated embedding: {type(embedding)}\n"
+    f"✅ Shape: {embedding.shape}\n"
+    f"✅ First 3 values: {embedding[:3]}\n"
+    "\n🔥 PROBLEM: Pinecone needs Python lists, not numpy arrays\n"
+    "Customer tries to upsert numpy array directly...\n"
+)
 
 # This is what breaks in customer code
 try:
@@ -36,50 +64,79 @@ try:
     }
     
     # Try to serialize (this is where it explodes)
-    json_data = json.dumps(fake_upsert_data)
+    json_data = orjson.dumps(fake_upsert_data)
     print("✅ JSON serialization worked somehow...")
     
 except TypeError as e:
     print(f"\n💥 JSON SERIALIZATION ERROR: {e}")
     print("💥 numpy arrays are not JSON serializable!")
 
-print(f"\n🔧 CUSTOMER ATTEMPTS FIX #1: Convert to list")
-embedding_list = embedding.tolist()
-print(f"✅ Converted to list: {type(embedding_list)}")
+print(f"\n🔧 FIX #1: Keep the vector in one float32 buffer (no per-float Python objects)")
+flat = pa.array(embedding.astype(np.float32, copy=False).ravel(), type=pa.float32())
+embedding_column = pa.FixedSizeListArray.from_arrays(flat, embedding.shape[0])
+print(f"✅ Arrow column: {embedding_column.type} ({embedding_column.nbytes} bytes)")
+
+# Where the REST API still needs JSON, orjson walks the numpy buffer in C
+rest_payload = orjson.dumps(fake_upsert_data, option=orjson.OPT_SERIALIZE_NUMPY)
+print(f"✅ REST payload serialized straight from numpy: {len(rest_payload)} bytes")
+
+# Round trip: numpy -> wire -> numpy, raw buffer vs JSON text
+start = time.perf_counter_ns()
+wire = to_wire(embedding)
+from_wire(wire)
+wire_us = (time.perf_counter_ns() - start) / 1e3
+
+start = time.perf_counter_ns()
+json_wire = orjson.dumps(embedding, option=orjson.OPT_SERIALIZE_NUMPY)
+np.array(orjson.loads(json_wire), dtype=np.float32)
+json_us = (time.perf_counter_ns() - start) / 1e3
+
+sys.stdout.write(
+    f"\n🔧 ROUND TRIP (d={embedding.shape[0]}):\n"
+    f"   Raw float32 buffer: {len(wire)} bytes, {wire_us:.1f} µs\n"
+    f"   JSON text:          {len(json_wire)} bytes, {json_us:.1f} µs\n"
+)
 
 # But wait, there's more problems...
 print(f"\n🔥 HIDDEN PROBLEM: Special float values")
 
 # Create an embedding with problematic values
 problematic_embedding = np.array([0.1, 0.2, np.nan, 0.4, np.inf])
-problematic_list = problematic_embedding.tolist()
 
-print(f"Problematic values: {problematic_list}")
+print(f"Problematic values: {problematic_embedding}")
 
-try:
-    json_test = json.dumps(problematic_list)
-    print("JSON serialization of special values...")
-except Exception as e:
-    print(f"💥 SPECIAL VALUES ERROR: {e}")
+# One vectorized pass finds them, no need to serialize and catch
+if not np.isfinite(problematic_embedding).all():
+    print("💥 SPECIAL VALUES DETECTED: NaN/Inf present in embedding")
 
 # Show what actually gets serialized
-json_with_special = json.dumps(problematic_list, allow_nan=True)
-print(f"JSON with special values: {json_with_special}")
+json_with_special = orjson.dumps(problematic_embedding, option=orjson.OPT_SERIALIZE_NUMPY)
+print(f"JSON with special values: {json_with_special.decode()}")
 print(f"🚨 Pinecone will reject null/infinity values!")
 
+print(f"\n🔧 FIX #2: Scrub the whole (N, d) batch before upsert")
+clean_embedding = sanitize(problematic_embedding)
+print(f"✅ Sanitized values: {clean_embedding}")
+
+# Or drop the bad rows: one C-level reduction per row, no per-vector Python checks
+batch = np.tile(embedding, (4, 1))
+batch[2, 0] = np.nan
+finite_rows = np.isfinite(batch).all(axis=1)
+clean_batch = batch[finite_rows]
+print(f"✅ Kept {len(clean_batch)} of {len(batch)} rows, dropped {np.flatnonzero(~finite_rows).tolist()}")
+
 print(f"\n🔥 PROBLEM #3: Metadata bloat")
 huge_metadata = {
-    "title": "Customer Support Document" * 100,  # Way too long
-    "content": "Full document text here..." * 1000,  # Massive
+    "content": "x" * 41_000,  # Whole document stuffed into metadata, one allocation
     "nested": {"deep": {"very": {"deep": {"structure": True}}}},  # Complex nesting
-    "list_data": list(range(1000)),  # Large arrays
+    "list_data": np.arange(1000, dtype=np.int32),  # Large arrays, one 4 KB buffer
 }
 
-metadata_size = len(json.dumps(huge_metadata))
-print(f"Metadata size: {metadata_size} bytes")
-print(f"🚨 Pinecone metadata limit: ~40KB per vector")
-print(f"🚨 Customer exceeded limit by: {metadata_size - 40000} bytes")
-
-print(f"\n" + "="*60)
-print("CSE DIAGNOSTIC SCENARIOS")
-print("="*60)
\ No newline at end of file
+metadata_size = len(orjson.dumps(huge_metadata, option=orjson.OPT_SERIALIZE_NUMPY))
+sys.stdout.write(
+    f"Metadata size: {metadata_size} bytes\n"
+    "🚨 Pinecone metadata limit: ~40KB per vector\n"
+    + (f"🚨 Customer exceeded limit by: {metadata_size - 40_000} bytes\n"
+       if metadata_size >= 40_000 else "")
+    + _QUIZ_BANNER
+)
@@ -1,72 +1,145 @@
 # Metadata: Customer Expectations vs Reality
 
-print("=== METADATA: CUSTOMER CONFUSION ===")
+import os
+import sys
+import time
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+# Pinecone's top_k ceiling for queries that return metadata or values
+MAX_METADATA_TOP_K = 1000
+
+
+def run_filter_bench(index, query_vec, category="support", top_k=10):
+    """
+    Time a single pre-filtered query against the post-filter anti-pattern.
+    The pre-filter lets the index skip non-matching candidates; the post-filter
+    pulls a wide result set back and throws most of it away client-side.
+    Returns (pre_filter_ms, post_filter_ms, pre_matches, post_matches).
+    """
+    start = time.perf_counter_ns()
+    pre = index.query(
+        vector=query_vec,
+        top_k=top_k,
+        filter={"category": {"$eq": category}},
+        include_metadata=True,
+    )
+    pre_ms = (time.perf_counter_ns() - start) / 1e6
+
+    start = time.perf_counter_ns()
+    wide = index.query(
+        vector=query_vec,
+        top_k=MAX_METADATA_TOP_K,
+        include_metadata=True,
+    )
+    post = [
+        m for m in wide.matches
+        if m.metadata and m.metadata.get("category") == category
+    ][:top_k]
+    post_ms = (time.perf_counter_ns() - start) / 1e6
+
+    return pre_ms, post_ms, pre.matches, post
 
 # Customer expectation: "Metadata makes queries faster!"
-print("❌ CUSTOMER MISCONCEPTION:")
-print("   'Adding metadata filters will speed up my queries'")
-print("   'More metadata = better performance'")
+_INTRO = f"""=== METADATA: CUSTOMER CONFUSION ===
+❌ CUSTOMER MISCONCEPTION:
+   'Adding metadata filters will speed up my queries'
+   'More metadata = better performance'
+
+✅ REALITY:
+   Pinecone applies metadata filters DURING the vector search (pre-filtering)
+   Filtering results yourself afterwards means over-fetching up to top_k={MAX_METADATA_TOP_K:,}
+   Metadata is for precision, not speed
+"""
 
-print("\n✅ REALITY:")
-print("   Metadata filtering happens AFTER vector similarity")
-print("   More complex filters = slower queries")
-print("   Metadata is for precision, not speed")
+sys.stdout.write(_INTRO)
 
 # Example scenarios
-scenarios = {
-    "no_filter": {
-        "query": "Find similar documents",
-        "process": "Vector similarity only",
-        "speed": "Fast",
-        "results": "10,000 similar documents"
-    },
-    "simple_filter": {
-        "query": "Find similar documents WHERE category='support'",
-        "process": "Vector similarity + simple filter",
-        "speed": "Medium", 
-        "results": "500 similar support documents"
-    },
-    "complex_filter": {
-        "query": "Find similar WHERE category='support' AND date > '2024-01-01' AND author IN ['alice','bob'] AND priority > 3",
-        "process": "Vector similarity + complex multi-field filter",
-        "speed": "Slow",
-        "results": "5 highly targeted documents"
-    }
-}
-
-print(f"\n📊 PERFORMANCE COMPARISON:")
-for name, scenario in scenarios.items():
-    print(f"\n{name.upper()}:")
-    print(f"   Query: {scenario['query']}")
-    print(f"   Speed: {scenario['speed']}")
-    print(f"   Results: {scenario['results']}")
-
-print(f"\n🎯 METADATA USE CASES:")
-use_cases = [
+class Scenario(NamedTuple):
+    query: str
+    process: str
+    speed: str
+    results: str
+
+
+SCENARIOS = (
+    ("no_filter", Scenario(
+        query="Find similar documents",
+        process="Vector similarity only",
+        speed="Fast",
+        results="10,000 similar documents",
+    )),
+    ("simple_filter", Scenario(
+        query="Find similar documents WHERE category='support'",
+        process="Vector similarity + simple filter",
+        speed="Medium",
+        results="500 similar support documents",
+    )),
+    ("complex_filter", Scenario(
+        query="Find similar WHERE category='support' AND date > '2024-01-01' AND author IN ['alice','bob'] AND priority > 3",
+        process="Vector similarity + complex multi-field filter",
+        speed="Slow",
+        results="5 highly targeted documents",
+    )),
+)
+
+_COMPARISON = "\n📊 PERFORMANCE COMPARISON:\n" + "".join(
+    f"\n{name.upper()}:\n"
+    f"   Query: {scenario.query}\n"
+    f"   Speed: {scenario.speed}\n"
+    f"   Results: {scenario.results}\n"
+    for name, scenario in SCENARIOS
+)
+
+USE_CASES = (
     "Multi-tenancy: 'Only search customer A's data'",
-    "Time filtering: 'Only documents from last month'", 
+    "Time filtering: 'Only documents from last month'",
     "Access control: 'Only public documents'",
     "Content type: 'Only PDF files'",
     "Business logic: 'Only active products'",
-    "A/B testing: 'Only experiment group B'"
-]
+    "A/B testing: 'Only experiment group B'",
+)
 
-for i, use_case in enumerate(use_cases, 1):
-    print(f"{i}. {use_case}")
+_USE_CASES = "\n🎯 METADATA USE CASES:\n" + "".join(
+    f"{i}. {use_case}\n" for i, use_case in enumerate(USE_CASES, 1)
+)
 
-print(f"\n⚠️  CUSTOMER GOTCHAS:")
-gotchas = [
-    "Filtering 1M vectors to find 10 = still processes 1M vectors first",
-    "Complex nested filters can timeout on large datasets", 
+GOTCHAS = (
+    f"Filtering client-side caps you at top_k={MAX_METADATA_TOP_K:,} candidates; rare matches get missed",
+    "Complex nested filters can timeout on large datasets",
     "Metadata size counts toward the 40KB limit per vector",
     "Some filter operations much slower than others (ranges vs equals)",
-    "Customers expect SQL-like performance, get vector-search reality"
-]
+    "Customers expect SQL-like performance, get vector-search reality",
+)
+
+_GOTCHAS = "\n⚠️  CUSTOMER GOTCHAS:\n" + "".join(
+    f"   • {gotcha}\n" for gotcha in GOTCHAS
+)
+
+_ESCALATION = """
+🚨 COMMON CSE ESCALATION:
+   Customer: 'Filtering makes my queries super slow!'
+   Reality: They're over-fetching wide result sets and filtering them client-side
+   Solution: Pass the filter in the query so Pinecone narrows candidates during the search
+"""
+
+sys.stdout.write(_COMPARISON + _USE_CASES + _GOTCHAS + _ESCALATION)
+
+# Back the prose with measured numbers when an index is available
+load_dotenv()
+if os.getenv("PINECONE_API_KEY"):
+    from pinecone import Pinecone
+    from _models import get_model
 
-for gotcha in gotchas:
-    print(f"   • {gotcha}")
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(
+        os.getenv("INDEX_NAME", "semantic-search-demo")
+    )
+    model = get_model(os.getenv("TRANSFORMER", "all-MiniLM-L6-v2"))
+    query_vec = model.encode("Find similar documents").tolist()
 
-print(f"\n🚨 COMMON CSE ESCALATION:")
-print(f"   Customer: 'Filtering makes my queries super slow!'")
-print(f"   Reality: They're filtering AFTER finding 100K similar vectors")
-print(f"   Solution: Reduce search scope first, then filter")
\ No newline at end of file
+    pre_ms, post_ms, pre_matches, post_matches = run_filter_bench(index, query_vec)
+    sys.stdout.write(
+        "\n⏱️  MEASURED ON YOUR INDEX:\n"
+        f"   Pre-filter (one filtered query): {pre_ms:.1f} ms, {len(pre_matches)} matches\n"
+        f"   Post-filter (top_k={MAX_METADATA_TOP_K:,} then filter): {post_ms:.1f} ms, {len(post_matches)} matches\n"
+    )
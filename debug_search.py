@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 """Debug the search manager initialization."""
 
+import importlib.util
 import logging
-from full_script import Config, SemanticSearchManager
+import os
 
 # Enable debug logging
-logging.basicConfig(level=logging.DEBUG)
+if os.getenv("DEBUG"):
+    logging.basicConfig(level=logging.DEBUG)
 
 def debug_search_manager():
     print("🔄 Testing SemanticSearchManager initialization...")
-    
+
+    # full_script pulls in torch + sentence-transformers, only pay for it here
+    if importlib.util.find_spec("sentence_transformers") is None:
+        print("❌ sentence-transformers is not installed")
+        return
+
     try:
+        from full_script import Config, SemanticSearchManager
+
         # Load config
         config = Config.from_env()
         print(f"✅ Config loaded: index={config.index_name}")
@@ -1,17 +1,28 @@
 import os
 import time
 import logging
-import hashlib
-from typing import List, Dict, Any, Optional, Tuple, Generator
+import queue
+import sqlite3
+from typing import List, Dict, Any, Optional, Tuple, Generator, Iterable
 from dataclasses import dataclass, field
 from pathlib import Path
+from collections import OrderedDict, deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import islice
 import json
 
+from blake3 import blake3
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
+from pinecone.exceptions import PineconeException
+from pinecone.grpc import PineconeGRPC
 from sentence_transformers import SentenceTransformer
 import numpy as np
+import torch
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 
@@ -25,6 +36,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pinecone's import format; without it Arrow infers list<double> for the values
+IMPORT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("values", pa.list_(pa.float32())),
+    ("metadata", pa.string()),
+])
+
 
 @dataclass
 class Config:
@@ -41,16 +59,28 @@ class Config:
     
     # Document processing
     vault_path: str = "~/Markdown"
+    text_store_path: str = "text_store.sqlite"  # Full text lives here, not in metadata
     max_text_length: int = 3000
     chunk_overlap: int = 200
     
     # Performance settings
-    batch_size: int = 50  # Increased for better performance
+    embedding_batch_size: int = 1000  # Large batches keep the encoder saturated
+    upsert_batch_size: int = 100  # Upper end of Pinecone's recommended range
     max_workers: int = 4
-    upload_delay: float = 0.5  # Reduced delay between batches
+    pool_threads: int = 30  # Concurrent in-flight upsert requests
+    
+    # Bulk import settings
+    import_uri: str = ""  # s3:// prefix for first-time bulk import; empty streams upserts
     
     # Model settings
     model_name: str = "all-MiniLM-L6-v2"
+    onnx_cpu_file: str = "onnx/model_quint8_avx2.onnx"  # Empty to use PyTorch on CPU
+    embedding_cache_path: str = "embeddings.db"
+    multi_gpu_threshold: int = 10_000  # Texts per encode call at which it fans out across CUDA devices
+    
+    # Query cache settings
+    query_cache_size: int = 256  # Recent queries kept in memory; 0 disables
+    query_cache_threshold: float = 0.95  # Cosine similarity that counts as the same query
     
     # Retry settings
     max_retries: int = 3
@@ -64,8 +94,11 @@ class Config:
         if self.dimension <= 0:
             raise ValueError("Dimension must be positive")
         
-        if self.batch_size <= 0 or self.batch_size > 100:
-            raise ValueError("Batch size must be between 1 and 100")
+        if self.embedding_batch_size <= 0:
+            raise ValueError("Embedding batch size must be positive")
+        
+        if self.upsert_batch_size <= 0 or self.upsert_batch_size > 100:
+            raise ValueError("Upsert batch size must be between 1 and 100")
         
         self.vault_path = os.path.expanduser(self.vault_path)
         if not os.path.exists(self.vault_path):
@@ -81,8 +114,11 @@ class Config:
             index_name=os.getenv("INDEX_NAME", cls.index_name),
             vault_path=os.getenv("VAULT_PATH", cls.vault_path),
             dimension=int(os.getenv("DIMENSION", cls.dimension)),
-            batch_size=int(os.getenv("BATCH_SIZE", cls.batch_size)),
+            embedding_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", cls.embedding_batch_size)),
+            upsert_batch_size=int(os.getenv("UPSERT_BATCH_SIZE", cls.upsert_batch_size)),
             max_workers=int(os.getenv("MAX_WORKERS", cls.max_workers)),
+            pool_threads=int(os.getenv("POOL_THREADS", cls.pool_threads)),
+            import_uri=os.getenv("IMPORT_URI", cls.import_uri),
         )
 
 
@@ -94,13 +130,14 @@ class Document:
     filename: str
     full_path: str
     category: str = "obsidian_note"
-    embedding: Optional[List[float]] = None
+    embedding: Optional[np.ndarray] = None  # float16, widened to float32 at upload
     metadata: Dict[str, Any] = field(default_factory=dict)
+    precomputed_hash: Optional[str] = None  # Hash of the raw bytes, when already read
     
     def __post_init__(self):
         """Generate document hash and add metadata."""
         self.metadata.update({
-            'text_hash': self._generate_hash(),
+            'text_hash': self.precomputed_hash or self._generate_hash(),
             'text_length': len(self.text),
             'filename': self.filename,
             'category': self.category
@@ -108,7 +145,32 @@ class Document:
     
     def _generate_hash(self) -> str:
         """Generate hash for content deduplication."""
-        return hashlib.md5(self.text.encode()).hexdigest()
+        return blake3(self.text.encode('utf-8')).hexdigest()
+
+
+class TextStore:
+    """Local SQLite store for document text, keyed by document id."""
+    
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS texts (id TEXT PRIMARY KEY, text TEXT)")
+        self.conn.commit()
+    
+    def put_many(self, documents: List[Document]):
+        """Store the text of each document."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO texts (id, text) VALUES (?, ?)",
+            [(doc.id, doc.text) for doc in documents]
+        )
+        self.conn.commit()
+    
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        """Look up text for the given document ids."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self.conn.execute(f"SELECT id, text FROM texts WHERE id IN ({placeholders})", ids)
+        return dict(rows)
 
 
 class DocumentProcessor:
@@ -120,42 +182,64 @@ class DocumentProcessor:
         
     def load_documents(self) -> List[Document]:
         """Load and process all markdown documents from vault."""
+        return list(self.iter_documents())
+    
+    def iter_documents(self) -> Generator[Document, None, None]:
+        """Yield documents in vault order while the directory walk is still running."""
         logger.info(f"Loading documents from: {self.vault_path}")
         
         if not self.vault_path.exists():
             raise FileNotFoundError(f"Vault path not found: {self.vault_path}")
         
-        md_files = list(self.vault_path.rglob("*.md"))
-        logger.info(f"Found {len(md_files)} markdown files")
-        
-        documents = []
+        loaded = 0
         failed_files = []
+        pending = deque()
+        window = self.config.max_workers * 4
         
-        for i, file_path in enumerate(md_files):
+        def take_oldest() -> Optional[Document]:
+            file_path, future = pending.popleft()
             try:
-                doc = self._process_file(file_path, i)
-                if doc:
-                    documents.append(doc)
+                return future.result()
             except Exception as e:
                 logger.error(f"Failed to process {file_path}: {e}")
                 failed_files.append(str(file_path))
+                return None
+        
+        # File reads are I/O bound, so overlap a bounded window of them across threads
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            for i, file_path in enumerate(self.vault_path.rglob("*.md")):
+                pending.append((file_path, executor.submit(self._process_file, file_path, i)))
+                if len(pending) >= window:
+                    doc = take_oldest()
+                    if doc:
+                        loaded += 1
+                        yield doc
+            
+            while pending:
+                doc = take_oldest()
+                if doc:
+                    loaded += 1
+                    yield doc
         
         if failed_files:
             logger.warning(f"Failed to process {len(failed_files)} files")
         
-        logger.info(f"Successfully loaded {len(documents)} documents")
-        return documents
+        logger.info(f"Successfully loaded {loaded} documents")
     
     def _process_file(self, file_path: Path, index: int) -> Optional[Document]:
         """Process a single markdown file."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read().strip()
+            # Read bytes once: hash them directly, then decode for the text
+            with open(file_path, 'rb') as f:
+                raw = f.read().strip()
             
-            if not content:
+            if not raw:
                 logger.debug(f"Skipping empty file: {file_path}")
                 return None
             
+            text_hash = blake3(raw).hexdigest()
+            content = raw.decode('utf-8', errors='replace')
+            
             # Truncate content if too long
             if len(content) > self.config.max_text_length:
                 content = content[:self.config.max_text_length]
@@ -168,6 +252,7 @@ class DocumentProcessor:
                 text=content,
                 filename=str(relative_path.with_suffix('')),
                 full_path=str(file_path),
+                precomputed_hash=text_hash,
             )
             
         except UnicodeDecodeError as e:
@@ -185,36 +270,139 @@ class EmbeddingGenerator:
         self.config = config
         self.model = None
         self._load_model()
+        self._open_cache()
+        # Per instance so the cache doesn't hold on to the generator
+        self.encode_query = lru_cache(maxsize=256)(self._encode_query)
+    
+    def _open_cache(self):
+        """Open the on-disk embedding cache keyed by model name + text hash."""
+        self.cache = sqlite3.connect(self.config.embedding_cache_path, check_same_thread=False)
+        self.cache.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings_int8 (key TEXT PRIMARY KEY, vec BLOB)"
+        )
+        self.cache.commit()
+    
+    def _cache_key(self, doc: Document) -> str:
+        return f"{self.config.model_name}:{doc.metadata['text_hash']}"
+    
+    def _cache_lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch cached embeddings for the given keys."""
+        found = {}
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.cache.execute(
+                f"SELECT key, vec FROM embeddings_int8 WHERE key IN ({placeholders})", chunk
+            )
+            for key, vec in rows:
+                found[key] = np.frombuffer(vec, dtype=np.int8).astype(np.float16) / 127
+        return found
+    
+    def _cache_store(self, entries: List[Tuple[str, np.ndarray]]):
+        """Write freshly generated embeddings back to the cache as int8."""
+        self.cache.executemany(
+            "INSERT OR REPLACE INTO embeddings_int8 (key, vec) VALUES (?, ?)",
+            [
+                (key, np.rint(np.clip(vec, -1, 1) * 127).astype(np.int8).tobytes())
+                for key, vec in entries
+            ]
+        )
+        self.cache.commit()
     
     def _load_model(self):
         """Load the sentence transformer model."""
         try:
             logger.info(f"Loading model: {self.config.model_name}")
-            self.model = SentenceTransformer(self.config.model_name)
-            logger.info("Model loaded successfully")
+            if torch.cuda.is_available():
+                self.device = "cuda"
+            elif torch.backends.mps.is_available():
+                self.device = "mps"
+            else:
+                self.device = "cpu"
+            if self.device == "cpu" and self.config.onnx_cpu_file:
+                self.model = self._load_onnx_model()
+            if self.model is None:
+                self.model = SentenceTransformer(self.config.model_name, device=self.device)
+            if self.device != "cpu":
+                # fp16 halves memory traffic on the accelerator
+                self.model.half()
+            logger.info(f"Model loaded successfully on {self.device}")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             raise
     
+    def _load_onnx_model(self) -> Optional[SentenceTransformer]:
+        """Load the int8-quantized ONNX Runtime export of the model for CPU inference."""
+        try:
+            model = SentenceTransformer(
+                self.config.model_name,
+                device="cpu",
+                backend="onnx",
+                model_kwargs={"file_name": self.config.onnx_cpu_file}
+            )
+            logger.info(f"Using quantized ONNX model: {self.config.onnx_cpu_file}")
+            return model
+        except Exception as e:
+            logger.warning(f"Quantized ONNX model unavailable, using PyTorch: {e}")
+            return None
+    
+    def _encode_multi_gpu(self, texts: List[str]) -> np.ndarray:
+        """Encode a large batch with one worker process per CUDA device."""
+        logger.info(f"Encoding {len(texts)} texts across {torch.cuda.device_count()} GPUs")
+        pool = self.model.start_multi_process_pool()
+        try:
+            embeddings = self.model.encode_multi_process(
+                texts, pool, batch_size=self.config.embedding_batch_size
+            )
+        finally:
+            self.model.stop_multi_process_pool(pool)
+            # Starting the pool moves the parent's copy of the model to the CPU
+            self.model.to(self.device)
+        return embeddings.astype(np.float32)
+    
+    def _encode_query(self, text: str) -> np.ndarray:
+        """Encode a search query to a unit-length float32 vector."""
+        embedding = self.model.encode(text).astype(np.float32)
+        embedding /= max(np.linalg.norm(embedding), 1e-12)
+        # Cached arrays are shared between callers
+        embedding.flags.writeable = False
+        return embedding
+    
     def generate_embeddings(self, documents: List[Document]) -> List[Document]:
         """Generate embeddings for documents with batch processing."""
         logger.info(f"Generating embeddings for {len(documents)} documents")
         
-        # Extract texts for batch processing
-        texts = [doc.text for doc in documents]
+        keys = [self._cache_key(doc) for doc in documents]
         
         try:
-            # Generate embeddings in batch for better performance
-            embeddings = self.model.encode(
-                texts,
-                batch_size=self.config.batch_size,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            )
+            # Only encode documents whose content hasn't been embedded before
+            cached = self._cache_lookup(keys)
+            misses = [i for i, key in enumerate(keys) if key not in cached]
+            logger.info(f"Embedding cache: {len(cached)} hits, {len(misses)} misses")
+            
+            if misses:
+                # Generate embeddings in batch for better performance
+                texts = [documents[i].text for i in misses]
+                if len(texts) >= self.config.multi_gpu_threshold and torch.cuda.device_count() > 1:
+                    embeddings = self._encode_multi_gpu(texts)
+                else:
+                    embeddings = self.model.encode(
+                        texts,
+                        batch_size=self.config.embedding_batch_size,
+                        show_progress_bar=True,
+                        convert_to_tensor=True
+                    ).float().cpu().numpy()
+                # Unit length up front: the int8 cache relies on values in [-1, 1],
+                # and cosine scores against these become plain dot products
+                embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+                new_entries = [(keys[i], embedding) for i, embedding in zip(misses, embeddings)]
+                self._cache_store(new_entries)
+                cached.update((key, embedding.astype(np.float16)) for key, embedding in new_entries)
             
             # Assign embeddings back to documents
-            for doc, embedding in zip(documents, embeddings):
-                doc.embedding = embedding.tolist()
+            for doc, key in zip(documents, keys):
+                doc.embedding = cached[key]
                 logger.debug(f"Generated embedding for {doc.filename}: {len(doc.embedding)} dimensions")
             
             logger.info("Embedding generation complete")
@@ -235,9 +423,9 @@ class PineconeManager:
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize Pinecone client."""
+        """Initialize Pinecone gRPC client."""
         try:
-            self.pc = Pinecone(api_key=self.config.pinecone_api_key)
+            self.pc = PineconeGRPC(api_key=self.config.pinecone_api_key)
             logger.info("Pinecone client initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Pinecone client: {e}")
@@ -266,7 +454,7 @@ class PineconeManager:
                 )
                 self._wait_for_index_ready()
             
-            self.index = self.pc.Index(self.config.index_name)
+            self.index = self.pc.Index(self.config.index_name, pool_threads=self.config.pool_threads)
             return self.index
             
         except Exception as e:
@@ -293,67 +481,91 @@ class PineconeManager:
         
         raise TimeoutError(f"Index not ready after {max_wait} seconds")
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=5)
-    )
     def upsert_documents(self, documents: List[Document]) -> bool:
-        """Upload documents to Pinecone with retry logic."""
+        """Upload documents to Pinecone, retrying only the batches that fail."""
         if not self.index:
             raise ValueError("Index not initialized")
         
-        vectors = self._prepare_vectors(documents)
-        total_batches = len(vectors) // self.config.batch_size + (1 if len(vectors) % self.config.batch_size else 0)
-        
-        logger.info(f"Uploading {len(vectors)} vectors in {total_batches} batches")
+        df = self._prepare_vectors(documents)
+        vectors = list(zip(df["id"], df["values"], df["metadata"]))
+        batch_size = self.config.upsert_batch_size
+        batches = [vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size)]
+        logger.info(f"Uploading {len(vectors)} vectors in {len(batches)} batches of {batch_size}")
         
-        successful_batches = 0
-        failed_batches = []
+        # Every batch goes out at once over the gRPC channel
+        pending = [(batch, self.index.upsert(vectors=batch, async_req=True)) for batch in batches]
         
-        for i in range(0, len(vectors), self.config.batch_size):
-            batch = vectors[i:i + self.config.batch_size]
-            batch_num = i // self.config.batch_size + 1
-            
+        upserted = 0
+        failed = 0
+        for batch, future in pending:
             try:
-                logger.debug(f"Uploading batch {batch_num}/{total_batches}: {len(batch)} vectors")
-                self.index.upsert(vectors=batch)
-                successful_batches += 1
-                
-                # Brief delay to avoid rate limiting
-                if self.config.upload_delay > 0:
-                    time.sleep(self.config.upload_delay)
-                    
+                upserted += future.result().upserted_count
             except Exception as e:
-                logger.error(f"Failed to upload batch {batch_num}: {e}")
-                failed_batches.append(batch_num)
-        
-        if failed_batches:
-            logger.error(f"Failed to upload {len(failed_batches)} batches: {failed_batches}")
+                logger.warning(f"Batch of {len(batch)} vectors failed, retrying: {e}")
+                try:
+                    upserted += self._upsert_one(batch)
+                except Exception as e:
+                    logger.error(f"Failed to upload batch of {len(batch)} vectors: {e}")
+                    failed += len(batch)
+        
+        if failed:
+            logger.error(f"Uploaded {upserted} vectors, {failed} failed")
             return False
         
-        logger.info(f"Successfully uploaded {successful_batches} batches")
+        logger.info(f"Successfully uploaded {upserted} vectors")
         return True
     
-    def _prepare_vectors(self, documents: List[Document]) -> List[Tuple[str, List[float], Dict[str, Any]]]:
-        """Prepare vectors for upload."""
-        vectors = []
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(min=0.5, max=8),
+        retry=retry_if_exception_type(PineconeException)
+    )
+    def _upsert_one(self, batch: List[Tuple[str, List[float], Dict[str, Any]]]) -> int:
+        """Upload one batch, backing off only when Pinecone pushes back (e.g. 429)."""
+        return self.index.upsert(vectors=batch).upserted_count
+    
+    def _prepare_vectors(self, documents: List[Document]) -> pd.DataFrame:
+        """Prepare an id/values/metadata DataFrame for upload."""
+        embedded = []
         for doc in documents:
-            if not doc.embedding:
+            if doc.embedding is None:
                 logger.warning(f"Document {doc.id} has no embedding, skipping")
                 continue
-            
-            # Prepare metadata (Pinecone has size limits)
-            metadata = {
-                "text": doc.text[:1000],  # Limit text size in metadata
-                "filename": doc.filename,
-                "category": doc.category,
-                "text_hash": doc.metadata.get("text_hash", ""),
-                "text_length": doc.metadata.get("text_length", 0)
-            }
-            
-            vectors.append((doc.id, doc.embedding, metadata))
+            embedded.append(doc)
+        
+        # Text stays in the local TextStore; metadata only carries small fields
+        df = pd.DataFrame({
+            "id": [doc.id for doc in embedded],
+            "filename": [doc.filename for doc in embedded],
+            "category": [doc.category for doc in embedded],
+            "text_hash": [doc.metadata.get("text_hash", "") for doc in embedded],
+            "text_length": [doc.metadata.get("text_length", 0) for doc in embedded],
+        })
+        metadata = df[["filename", "category", "text_hash", "text_length"]].to_dict(orient="records")
+        
+        return pd.DataFrame({
+            "id": df["id"],
+            "values": [doc.embedding.astype(np.float32).tolist() for doc in embedded],
+            "metadata": metadata,
+        })
+    
+    def bulk_import(self, documents: List[Document]) -> str:
+        """Write vectors as Parquet under config.import_uri and start a Pinecone import."""
+        df = self._prepare_vectors(documents)
+        # The import format expects metadata as a JSON string column
+        df["metadata"] = df["metadata"].map(json.dumps)
+        
+        prefix = self.config.import_uri.rstrip("/")
+        pq.write_table(
+            pa.Table.from_pandas(df, schema=IMPORT_SCHEMA, preserve_index=False),
+            f"{prefix}/__default__/{self.config.index_name}-0.parquet"
+        )
         
-        return vectors
+        # Bulk import is only exposed on the REST index
+        import_index = Pinecone(api_key=self.config.pinecone_api_key).Index(self.config.index_name)
+        operation = import_index.start_import(uri=f"{prefix}/")
+        logger.info(f"Started bulk import {operation.id} of {len(df)} vectors from {prefix}/")
+        return operation.id
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=5))
     def get_index_stats(self) -> Dict[str, Any]:
@@ -381,29 +593,40 @@ class SemanticSearchManager:
         self.doc_processor = DocumentProcessor(config)
         self.embedding_generator = EmbeddingGenerator(config)
         self.pinecone_manager = PineconeManager(config)
+        self.text_store = TextStore(config.text_store_path)
+        # Recent query embeddings as rows of one matrix; the OrderedDict maps
+        # row -> (top_k, results) and keeps rows in least-recently-used order
+        self._query_vectors = np.zeros((config.query_cache_size, config.dimension), dtype=np.float32)
+        self._query_results: OrderedDict = OrderedDict()
     
     def index_documents(self) -> bool:
         """Complete pipeline to index documents."""
         try:
             logger.info("Starting document indexing pipeline")
             
-            # Step 1: Load documents
-            documents = self.doc_processor.load_documents()
-            if not documents:
-                logger.warning("No documents to process")
-                return False
-            
-            # Step 2: Generate embeddings
-            documents = self.embedding_generator.generate_embeddings(documents)
-            
-            # Step 3: Ensure Pinecone index exists
+            # Step 1: Ensure Pinecone index exists
             self.pinecone_manager.ensure_index_exists()
             
-            # Step 4: Upload to Pinecone
-            success = self.pinecone_manager.upsert_documents(documents)
+            # Step 2: First load of an empty index goes through bulk import
+            if self.config.import_uri and self.pinecone_manager.get_index_stats()["total_vector_count"] == 0:
+                documents = self.doc_processor.load_documents()
+                if not documents:
+                    logger.warning("No documents to process")
+                    return False
+                documents = self.embedding_generator.generate_embeddings(documents)
+                self.text_store.put_many(documents)
+                self.pinecone_manager.bulk_import(documents)
+                logger.info("Bulk import started; vectors appear once the import completes")
+                return True
+            
+            # Step 3: Stream documents from the vault walk into embedding and upload
+            success = self._embed_and_upsert(self.doc_processor.iter_documents())
             
             if success:
-                # Step 5: Verify upload
+                # Cached results predate the new vectors
+                self._query_results.clear()
+                
+                # Step 4: Verify upload
                 stats = self.pinecone_manager.get_index_stats()
                 logger.info(f"Indexing complete! Total vectors: {stats['total_vector_count']}")
                 return True
@@ -415,6 +638,59 @@ class SemanticSearchManager:
             logger.error(f"Indexing pipeline failed: {e}")
             return False
     
+    def _embed_and_upsert(self, documents: Iterable[Document]) -> bool:
+        """Embed chunks on this thread while worker threads upsert finished chunks."""
+        chunk_size = self.config.embedding_batch_size
+        window_size = chunk_size * 4
+        encode_size = chunk_size
+        if torch.cuda.device_count() > 1:
+            # Encoding only fans out across GPUs past multi_gpu_threshold texts,
+            # so encode whole windows that large and split them for upload after
+            window_size = encode_size = max(window_size, self.config.multi_gpu_threshold)
+        embedded_chunks: queue.Queue = queue.Queue(maxsize=4)
+        documents = iter(documents)
+        processed = 0
+        
+        def consume() -> bool:
+            ok = True
+            while True:
+                chunk = embedded_chunks.get()
+                if chunk is None:
+                    return ok
+                try:
+                    ok = self.pinecone_manager.upsert_documents(chunk) and ok
+                except Exception as e:
+                    logger.error(f"Failed to upload chunk: {e}")
+                    ok = False
+        
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            consumers = [executor.submit(consume) for _ in range(self.config.max_workers)]
+            try:
+                while True:
+                    # encode() length-sorts within a call, but each chunk is one padded
+                    # batch, so sort a window of chunks to keep short notes out of chunks
+                    # with long ones. Upsert order doesn't matter since ids are fixed.
+                    window = sorted(islice(documents, window_size), key=lambda doc: len(doc.text))
+                    if not window:
+                        break
+                    processed += len(window)
+                    for i in range(0, len(window), encode_size):
+                        embedded = self.embedding_generator.generate_embeddings(window[i:i + encode_size])
+                        self.text_store.put_many(embedded)
+                        for j in range(0, len(embedded), chunk_size):
+                            embedded_chunks.put(embedded[j:j + chunk_size])
+            finally:
+                # One sentinel per consumer so every worker drains and exits
+                for _ in consumers:
+                    embedded_chunks.put(None)
+            
+            uploaded = all(consumer.result() for consumer in consumers)
+        
+        if not processed:
+            logger.warning("No documents to process")
+            return False
+        return uploaded
+    
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Search the indexed documents."""
         try:
@@ -423,8 +699,13 @@ class SemanticSearchManager:
             if not self.pinecone_manager.index:
                 raise ValueError("Index not initialized")
             
-            # Generate query embedding
-            query_embedding = self.embedding_generator.model.encode(query)
+            # Generate query embedding (memoized, so retries with a new top_k skip the model)
+            query_embedding = self.embedding_generator.encode_query(query)
+            
+            cached = self._cached_results(query_embedding, top_k)
+            if cached is not None:
+                logger.info(f"Found {len(cached)} results (query cache)")
+                return cached
             
             # Perform search
             results = self.pinecone_manager.index.query(
@@ -433,23 +714,50 @@ class SemanticSearchManager:
                 include_metadata=True
             )
             
-            # Format results
+            # Format results, pulling text from the local store
+            matches = results.get('matches', [])
+            texts = self.text_store.get_many([match['id'] for match in matches])
             formatted_results = []
-            for match in results.get('matches', []):
+            for match in matches:
                 formatted_results.append({
                     'id': match['id'],
                     'score': match['score'],
                     'filename': match['metadata'].get('filename', 'Unknown'),
-                    'text': match['metadata'].get('text', ''),
+                    'text': texts.get(match['id']) or match['metadata'].get('text', ''),
                     'category': match['metadata'].get('category', 'unknown')
                 })
             
+            self._cache_results(query_embedding, top_k, formatted_results)
             logger.info(f"Found {len(formatted_results)} results")
             return formatted_results
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
+    def _cached_results(self, query_embedding: np.ndarray, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Return results of a recent, near-identical query that fetched at least top_k matches."""
+        if not self._query_results:
+            return None
+        # Rows are filled in order and evicted rows are reused, so the first
+        # len(cache) rows are exactly the live entries
+        scores = self._query_vectors[:len(self._query_results)] @ query_embedding
+        row = int(np.argmax(scores))
+        cached_top_k, results = self._query_results[row]
+        if scores[row] < self.config.query_cache_threshold or cached_top_k < top_k:
+            return None
+        self._query_results.move_to_end(row)
+        return results[:top_k]
+    
+    def _cache_results(self, query_embedding: np.ndarray, top_k: int, results: List[Dict[str, Any]]):
+        """Remember a query's results, evicting the least recently used entry when full."""
+        if not self.config.query_cache_size:
+            return
+        if len(self._query_results) < self.config.query_cache_size:
+            row = len(self._query_results)
+        else:
+            row, _ = self._query_results.popitem(last=False)
+        self._query_vectors[row] = query_embedding
+        self._query_results[row] = (top_k, results)
 
 def interactive_search(search_manager: SemanticSearchManager):
     """Interactive search loop for testing queries."""
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import os
+import sqlite3
+import threading
+import numpy as np
+from blake3 import blake3
+
+# One file next to the scripts, so every script and session shares it
+CACHE_PATH = os.getenv(
+    "EMBED_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_embeddings.db"),
+)
+
+
+class CachedEncoder:
+    """
+    Wraps a SentenceTransformer so encode() first looks texts up in an on-disk
+    SQLite cache keyed by model name + text hash, and only runs the model on
+    misses. Embeddings are stored as float16; encode() always returns float32
+    numpy. Any other attribute is passed through to the wrapped model.
+    """
+
+    def __init__(self, model, model_name, path=CACHE_PATH):
+        self.model = model
+        self.model_name = model_name
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vec BLOB)"
+        )
+        self._db.commit()
+        # The connection is shared by threads (e.g. asyncio.to_thread searches)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, texts, **kwargs):
+        """Encode a string or list of strings, reusing cached embeddings."""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        kwargs["convert_to_numpy"] = True
+        kwargs.pop("convert_to_tensor", None)
+        # Normalized and raw embeddings of the same text are different entries
+        prefix = f"{self.model_name}:{int(bool(kwargs.get('normalize_embeddings')))}:"
+        keys = [prefix + blake3(text.encode("utf-8")).hexdigest(length=16) for text in texts]
+
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, vec FROM query_embeddings WHERE key IN ({placeholders})", chunk
+                )
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float16)
+
+        misses = {key: text for key, text in zip(keys, texts) if key not in found}
+        if misses:
+            embeddings = self.model.encode(list(misses.values()), **kwargs).astype(np.float16)
+            found.update(zip(misses, embeddings))
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vec) VALUES (?, ?)",
+                    [(key, found[key].tobytes()) for key in misses],
+                )
+                self._db.commit()
+
+        embeddings = np.stack([found[key] for key in keys]).astype(np.float32)
+        return embeddings[0] if single else embeddings
@@ -1,63 +1,174 @@
 #!/usr/bin/env python3
 import os
+import queue
+import threading
 import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from itertools import batched
+from blake3 import blake3
 from dotenv import load_dotenv
-from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
+from PIL import Image
 from obsidian_loader import load_obsidian_vault
-from pinecone_uploader import upload_documents_to_pinecone
-
-
-# Configuration
-load_dotenv()
-api_key = os.getenv("PINECONE_API_KEY")
-index_name = "multimodal-search-v2"
-
-# Initialize Pinecone
-pc = Pinecone(api_key=api_key)
-
-if pc.has_index(name=index_name):
-    print(f"Using existing index: {index_name}")
-else:
-    # Create fresh index
-    print("Creating new index...")
-    pc.create_index(
-        name=index_name,
-        dimension=512,  # CLIP model dimension
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-west-2")
-    )
-    print("Waiting for index to be ready...")
-    time.sleep(30)
-
-print(f"Index '{index_name}' is ready!")
-
-documents = load_obsidian_vault()
-MODEL = "clip-ViT-B-32"  # Multimodal model that handles text and images
-model = SentenceTransformer(MODEL)
-print("Creating embeddings for documents...")
-for doc in documents:
-    if doc.get("file_type") == "image":
-        # For images, encode the actual image file
+
+# torch, sentence-transformers and the Pinecone client are imported in the
+# functions that use them, so importing this module stays cheap
+
+
+def _load_image(path, size=224):
+    """Open an image as RGB, shrunk so its short side is CLIP's input size, and close the file."""
+    with Image.open(path) as image:
+        # CLIP resizes the short side to 224 anyway; shrinking here bounds the
+        # memory a large screenshot holds while it waits in a batch
+        scale = min(1.0, size / min(image.size))
+        target = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image.draft("RGB", target)  # JPEGs decode straight at a reduced scale
+        image = image.convert("RGB")
+    return image.resize(target) if image.size != target else image
+
+
+def _encode_into(model, docs, inputs, on_gpu):
+    """Encode inputs in one call and attach each embedding to its document."""
+    import torch
+
+    # One call lets sentence-transformers length-sort and pad per batch.
+    # fp16 on CUDA via autocast: CLIP's image processor emits float32
+    # pixels, which a .half() model would reject.
+    with torch.autocast("cuda", dtype=torch.float16) if on_gpu else nullcontext():
+        embeddings = model.encode(
+            inputs,
+            batch_size=256 if on_gpu else 64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=True,
+        )
+    for doc, embedding in zip(docs, embeddings):
+        doc["embedding"] = embedding  # ndarray; the uploader converts to float32 lists per batch
+        print(f"Document '{doc['id']}' ({doc.get('file_type', 'text')}) embedded: {len(doc['embedding'])} dimensions")
+
+
+def embed_documents(model, documents, batch_size=1024, image_batch_size=32, dedup_cache_size=16_384):
+    """Yield documents with embeddings, encoding batch_size of them at a time."""
+    # Content hash -> embedding of recently encoded text. Templated notes and
+    # repeated headers produce byte-identical chunks that only need one encode.
+    seen = OrderedDict()
+    on_gpu = model.device.type == "cuda"
+    for batch in batched(documents, batch_size):
+        text_docs = [doc for doc in batch if doc.get("file_type") != "image"]
+
+        # Decode only image_batch_size images at a time, so a batch full of
+        # screenshots never holds more than that many bitmaps in memory
+        for image_docs in batched((doc for doc in batch if doc.get("file_type") == "image"), image_batch_size):
+            loaded, images = [], []
+            for doc in image_docs:
+                try:
+                    images.append(_load_image(doc["full_path"]))
+                    loaded.append(doc)
+                except Exception as e:
+                    print(f"Error encoding image {doc['filename']}: {e}")
+                    # Fallback to text embedding
+                    text_docs.append(doc)
+            if loaded:
+                _encode_into(model, loaded, images, on_gpu)
+
+        # Encode each distinct chunk once; duplicates pick up its embedding below
+        unique_docs = {}
+        for doc in text_docs:
+            doc["content_hash"] = blake3(doc["text"].encode("utf-8")).hexdigest(length=16)
+            if doc["content_hash"] not in seen:
+                unique_docs.setdefault(doc["content_hash"], doc)
+        unique_docs = list(unique_docs.values())
+        if unique_docs:
+            _encode_into(model, unique_docs, [doc["text"] for doc in unique_docs], on_gpu)
+
+        for doc in unique_docs:
+            seen[doc["content_hash"]] = doc["embedding"]
+        duplicates = 0
+        for doc in text_docs:
+            if "embedding" not in doc:
+                doc["embedding"] = seen[doc["content_hash"]]
+                seen.move_to_end(doc["content_hash"])
+                duplicates += 1
+        if duplicates:
+            print(f"Reused embeddings for {duplicates} duplicate chunks")
+        while len(seen) > dedup_cache_size:
+            seen.popitem(last=False)
+
+        yield from batch
+
+
+def prefetch(iterable, depth):
+    """Yield from iterable while a background thread runs up to depth items ahead."""
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    errors = []
+
+    def produce():
         try:
-            from PIL import Image
-            image = Image.open(doc["full_path"])
-            embedding = model.encode(image)
+            for item in iterable:
+                items.put(item)
         except Exception as e:
-            print(f"Error encoding image {doc['filename']}: {e}")
-            # Fallback to text embedding
-            embedding = model.encode(doc["text"])
+            errors.append(e)
+        finally:
+            items.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while (item := items.get()) is not done:
+        yield item
+    if errors:
+        raise errors[0]
+
+
+def main():
+    from model_loader import best_device, pin_torch_threads
+    from pinecone import ServerlessSpec
+    from pinecone.grpc import PineconeGRPC
+    from sentence_transformers import SentenceTransformer
+    from pinecone_uploader import upload_documents_to_pinecone
+
+    pin_torch_threads()
+
+    # Configuration
+    load_dotenv()
+    api_key = os.getenv("PINECONE_API_KEY")
+    index_name = "multimodal-search-v2"
+
+    # Initialize Pinecone
+    pc = PineconeGRPC(api_key=api_key)
+
+    if pc.has_index(name=index_name):
+        print(f"Using existing index: {index_name}")
     else:
-        # For text/PDF content
-        embedding = model.encode(doc["text"])
+        # Create fresh index
+        print("Creating new index...")
+        pc.create_index(
+            name=index_name,
+            dimension=512,  # CLIP model dimension
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-west-2")
+        )
+        print("Waiting for index to be ready...")
+        time.sleep(30)
+
+    print(f"Index '{index_name}' is ready!")
 
-    doc["embedding"] = embedding.tolist()
-    print(f"Document '{doc['id']}' ({doc.get('file_type', 'text')}) embedded: {len(doc['embedding'])} dimensions")
+    documents = load_obsidian_vault()
+    MODEL = "clip-ViT-B-32"  # Multimodal model that handles text and images
+    device = best_device()
+    model = SentenceTransformer(MODEL, device=device)
+    print(f"Encoding on {device}")
+    print("Creating embeddings for documents...")
+    # Documents stream from the vault through encoding into the uploader. The
+    # encoder runs on its own thread up to two batches ahead, so the model
+    # keeps working while earlier batches are on the wire.
+    embedded = prefetch(embed_documents(model, documents), depth=2 * 1024)
+    index = upload_documents_to_pinecone(embedded, index_name, pc)
 
+    # Test search on your knowledge base
+    print("\n" + "=" * 50)
+    print("TESTING YOUR OBSIDIAN KNOWLEDGE BASE")
+    print("=" * 50)
 
-index = upload_documents_to_pinecone(documents, index_name, pc)
 
-# Test search on your knowledge base
-print("\n" + "=" * 50)
-print("TESTING YOUR OBSIDIAN KNOWLEDGE BASE")
-print("=" * 50)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import os
+from functools import lru_cache
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+
+def best_device():
+    """Pick the fastest available torch device: CUDA, then Apple MPS, then CPU."""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def pin_torch_threads():
+    """Use one intra-op thread per physical core; hyperthreads oversubscribe the matmuls."""
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+
+def cap_query_length(model, limit=128):
+    """
+    Bound the tokens encoded per query. Queries are short; the cap bounds the
+    cost of an occasional pasted paragraph. It only ever lowers the model's own
+    window (e.g. CLIP's 77 tokens), which longer inputs would overflow.
+    """
+    if model.max_seq_length is not None:
+        model.max_seq_length = min(model.max_seq_length, limit)
+
+
+def load_model(name):
+    """Load the int8 ONNX export for fast CPU query encoding, falling back to PyTorch."""
+    try:
+        return SentenceTransformer(
+            name, backend="onnx", model_kwargs={"file_name": "onnx/model_quint8_avx2.onnx"}
+        )
+    except Exception as e:
+        print(f"Quantized ONNX model unavailable, using PyTorch: {e}")
+        return SentenceTransformer(name)
+
+
+def query_encoder(model, maxsize=1024):
+    """Return encode(query) -> unit-norm float32 vector, memoized so repeated queries skip the model."""
+    @lru_cache(maxsize=maxsize)
+    def encode_bytes(query):
+        # Cached as bytes, so callers get read-only views and can't alter the cache
+        embedding = model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
+        return embedding.astype(np.float32).tobytes()
+
+    def encode(query):
+        return np.frombuffer(encode_bytes(query), dtype=np.float32)
+
+    return encode
@@ -1,104 +1,158 @@
 #!/usr/bin/env python3
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import PyPDF2
 
-
-def chunk_text(text, chunk_size=1000, overlap=200):
-    """Chunk text into smaller pieces with overlap."""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start += chunk_size - overlap
-    return chunks
+try:
+    # MuPDF extracts text in C, far faster than PyPDF2's pure-Python parser
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+SUPPORTED_EXTENSIONS = frozenset({".md", ".pdf", ".png", ".jpg", ".jpeg", ".txt"})
+
+
+def iter_chunks(text, chunk_size=1000, overlap=200):
+    """Yield overlapping chunks of text one at a time."""
+    # Each slice copies only chunk_size characters, so the total is linear
+    for start in range(0, len(text), chunk_size - overlap):
+        yield text[start:start + chunk_size]
+
+
+def _walk(path):
+    """Yield supported files under path, each directory's files before its subdirectories."""
+    print(f"Scanning directory: {path}")
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # DirEntry carries the type from the directory read, so no extra stat
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS and entry.is_file():
+                    yield entry.path
+    except OSError as e:
+        # os.walk skipped unreadable directories silently; at least say so
+        print(f"Skipping {path}: {e}")
+        return
+    for subdir in subdirs:
+        yield from _walk(subdir)
+
+
+def _read_text(file_path):
+    """Read a text or markdown file."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _read_pdf(file_path):
+    """Extract the text of every page of a PDF."""
+    if pymupdf is not None:
+        try:
+            with pymupdf.open(file_path) as doc:
+                return "".join(page.get_text() + "\n" for page in doc)
+        except Exception as e:
+            print(f"pymupdf failed on {file_path}, falling back to PyPDF2: {e}")
+    with open(file_path, "rb") as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        # One join instead of re-copying the growing string for every page
+        return "".join(page.extract_text() + "\n" for page in pdf_reader.pages)
 
 
-def load_obsidian_vault():
-    """Load all supported files from your Obsidian vault recursively and chunk them."""
-    docs = []
+def load_obsidian_vault(read_ahead=64):
+    """Yield chunked documents from your Obsidian vault, reading files as they are consumed."""
     base_path = os.path.expanduser("/Users/will/Markdown")
     doc_id_counter = 1
 
     supported_files = []
-    supported_extensions = [".md", ".pdf", ".png", ".jpg", ".jpeg", ".txt"]
-
-    for root, dirs, files in os.walk(base_path):
-        print(f"Scanning directory: {root}")
-        for file in files:
-            if any(file.lower().endswith(ext) for ext in supported_extensions):
-                full_path = os.path.join(root, file)
-                relative_path = os.path.relpath(full_path, base_path)
-                supported_files.append((full_path, relative_path))
-                print(f"  Found: {relative_path}")
+    for full_path in _walk(base_path):
+        relative_path = os.path.relpath(full_path, base_path)
+        supported_files.append((full_path, relative_path))
+        print(f"  Found: {relative_path}")
 
     print(f"Found {len(supported_files)} supported files")
 
-    for file_path, relative_filename in supported_files:
-        try:
-            # Extract category from folder structure
-            parts = relative_filename.split('/')
-            if len(parts) > 1:
-                category = parts[0]
-            else:
-                category = "general"
-
-            # Determine file type and extract content
-            file_ext = os.path.splitext(file_path)[1].lower()
-
-            if file_ext == ".md" or file_ext == ".txt":
-                # Text files
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                chunks = chunk_text(content)
-
-                for i, chunk in enumerate(chunks):
-                    docs.append({
-                        "id": f"text_{doc_id_counter}",
-                        "text": chunk,
-                        "filename": relative_filename,
-                        "category": category,
-                        "file_type": "text",
-                        "full_path": file_path,
-                    })
-                    doc_id_counter += 1
-
-            elif file_ext == ".pdf":
-                # PDF files
-                with open(file_path, "rb") as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    content = ""
-                    for page in pdf_reader.pages:
-                        content += page.extract_text() + "\n"
-
-                if content.strip():
-                    chunks = chunk_text(content)
-                    for i, chunk in enumerate(chunks):
-                        docs.append({
-                            "id": f"pdf_{doc_id_counter}",
+    # Keep read_ahead reads in flight on a thread pool: text reads are I/O
+    # bound and pymupdf parses PDFs in C with the GIL released, so threads
+    # overlap both without worker processes. The loop below consumes them in
+    # scan order, keeping ids stable, so only the window's contents are in
+    # memory at once.
+    threads = ThreadPoolExecutor(max_workers=16)
+    reads = {}
+
+    def start_read(file_path):
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == ".md" or file_ext == ".txt":
+            reads[file_path] = threads.submit(_read_text, file_path)
+        elif file_ext == ".pdf":
+            reads[file_path] = threads.submit(_read_pdf, file_path)
+
+    try:
+        for file_path, _ in supported_files[:read_ahead]:
+            start_read(file_path)
+
+        for n, (file_path, relative_filename) in enumerate(supported_files):
+            if n + read_ahead < len(supported_files):
+                start_read(supported_files[n + read_ahead][0])
+            try:
+                # Extract category from folder structure
+                parts = relative_filename.split('/')
+                if len(parts) > 1:
+                    category = parts[0]
+                else:
+                    category = "general"
+
+                # Determine file type and extract content
+                file_ext = os.path.splitext(file_path)[1].lower()
+
+                if file_ext == ".md" or file_ext == ".txt":
+                    # Text files
+                    content = reads.pop(file_path).result()
+                    for chunk in iter_chunks(content):
+                        yield {
+                            "id": f"text_{doc_id_counter}",
                             "text": chunk,
                             "filename": relative_filename,
                             "category": category,
-                            "file_type": "pdf",
+                            "file_type": "text",
                             "full_path": file_path,
-                        })
+                        }
                         doc_id_counter += 1
 
-            elif file_ext in [".png", ".jpg", ".jpeg"]:
-                # Image files - we'll store the path for CLIP to process
-                docs.append({
-                    "id": f"image_{doc_id_counter}",
-                    "text": f"Image file: {relative_filename}",  # Placeholder text
-                    "filename": relative_filename,
-                    "category": category,
-                    "file_type": "image",
-                    "full_path": file_path,
-                })
-                doc_id_counter += 1
+                elif file_ext == ".pdf":
+                    # PDF files
+                    content = reads.pop(file_path).result()
+
+                    if content.strip():
+                        for chunk in iter_chunks(content):
+                            yield {
+                                "id": f"pdf_{doc_id_counter}",
+                                "text": chunk,
+                                "filename": relative_filename,
+                                "category": category,
+                                "file_type": "pdf",
+                                "full_path": file_path,
+                            }
+                            doc_id_counter += 1
+
+                elif file_ext in [".png", ".jpg", ".jpeg"]:
+                    # Image files - we'll store the path for CLIP to process
+                    yield {
+                        "id": f"image_{doc_id_counter}",
+                        "text": f"Image file: {relative_filename}",  # Placeholder text
+                        "filename": relative_filename,
+                        "category": category,
+                        "file_type": "image",
+                        "full_path": file_path,
+                    }
+                    doc_id_counter += 1
 
-        except Exception as e:
-            print(f"Error processing {relative_filename}: {e}")
+            except Exception as e:
+                print(f"Error processing {relative_filename}: {e}")
+    finally:
+        # Also runs when the consumer stops early or the generator is closed:
+        # drop reads that haven't started rather than waiting on them
+        threads.shutdown(wait=False, cancel_futures=True)
 
-    print(f"Successfully loaded and chunked {len(docs)} documents")
-    return docs
+    print(f"Successfully loaded and chunked {doc_id_counter - 1} documents")
@@ -1,27 +1,29 @@
 import os
+import sys
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
+from model_loader import cap_query_length, load_model, pin_torch_threads, query_encoder
+from pinecone.grpc import PineconeGRPC as Pinecone
+
+pin_torch_threads()
+
+
+# Loaded once per process instead of on every search
+load_dotenv()
+if not os.getenv("PINECONE_API_KEY"):
+    raise ValueError("PINECONE_API_KEY not found in environment variables")
+_PC = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+_INDEX = _PC.Index("semantic-search-demo")
+_MODEL = load_model(os.getenv("TRANSFORMER") or "all-MiniLM-L6-v2")
+cap_query_length(_MODEL)
+# Repeated queries skip the model entirely
+_encode_cached = query_encoder(_MODEL)
 
 
 def search_obsidian_knowledge_base(query, top_k=5):
     """Search the Obsidian knowledge base using semantic similarity"""
-    # Load environment variables
-    load_dotenv()
-    api_key = os.getenv("PINECONE_API_KEY")
-    if not api_key:
-        raise ValueError("PINECONE_API_KEY not found in environment variables")
-
-    MODEL = os.getenv("TRANSFORMER")
-    # Initialize Pinecone and SentenceTransformer
-    index_name = "semantic-search-demo"
-    model = SentenceTransformer(MODEL)
-    pc = Pinecone(api_key=api_key)
-    index = pc.Index(index_name)
-
     # Encode query and perform search
-    query_embedding = model.encode(query)
-    results = index.query(
+    query_embedding = _encode_cached(query)
+    results = _INDEX.query(
         vector=query_embedding.tolist(), top_k=top_k, include_metadata=True
     )
 
@@ -34,14 +36,17 @@ def search_obsidian_knowledge_base(query, top_k=5):
         print("No results found for the query.")
         return None
 
-    for i, match in enumerate(results["matches"], 1):
-        print(f"{i}. ID: {match['id']} (Score: {match['score']:.4f})")
-        print(f"   File: {match['metadata'].get('filename', 'Unknown')}")
-        print(f"   Text: {match['metadata'].get('text', 'No text')[:100]}")
-        print()
+    # Build the listing and write it once instead of four prints per match
+    sys.stdout.write("".join(
+        f"{i}. ID: {match['id']} (Score: {match['score']:.4f})\n"
+        f"   File: {match['metadata'].get('filename', 'Unknown')}\n"
+        f"   Text: {match['metadata'].get('text', 'No text')[:100]}\n\n"
+        for i, match in enumerate(results["matches"], 1)
+    ))
 
     return results
 
 
-# Example query
-search_obsidian_knowledge_base("hacking")
+if __name__ == "__main__":
+    # Example query
+    search_obsidian_knowledge_base("hacking")
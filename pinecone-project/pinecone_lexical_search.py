@@ -1,7 +1,29 @@
 #!/usr/bin/env python3
 import os
+import sys
+import zlib
+from functools import lru_cache
+import numpy as np
 from dotenv import load_dotenv
-from pinecone import Pinecone
+from pinecone.grpc import PineconeGRPC as Pinecone
+
+
+# Connected once per process instead of on every search
+load_dotenv()
+_PC = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+_INDEX = _PC.Index("multimodal-search-v2")
+
+
+@lru_cache(maxsize=None)
+def _get_model():
+    """Load the dense model on first use; only the fallback path needs it."""
+    from sentence_transformers import SentenceTransformer
+    from model_loader import cap_query_length, pin_torch_threads
+
+    pin_torch_threads()
+    model = SentenceTransformer(os.getenv("TRANSFORMER_MODEL") or "all-MiniLM-L6-v2")
+    cap_query_length(model)
+    return model
 
 
 def lexical_search(query, top_k=10):
@@ -9,10 +31,6 @@ def lexical_search(query, top_k=10):
     Perform lexical (keyword-based) search using BM25 sparse vectors.
     This is traditional keyword matching, not semantic search.
     """
-    load_dotenv()
-
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index("multimodal-search-v2")
     namespace = "__default__"
 
     # For demonstration, we'll create a simple sparse vector
@@ -30,24 +48,25 @@ def lexical_search(query, top_k=10):
 
     # Create a simple sparse vector representation
     # In production, use proper BM25 encoding with document frequencies
-    sparse_indices = []
-    sparse_values = []
-
-    # Simple hash function to convert tokens to indices (for demo only)
-    for i, token in enumerate(tokens):
-        # Simple hash to get an index (in production, use proper vocabulary mapping)
-        index_val = abs(hash(token)) % 10000  # Limit to 10000 dimensions
-        sparse_indices.append(index_val)
-        # Simple TF value (in production, use proper BM25 scoring)
-        sparse_values.append(1.0)
+    # Hash tokens to indices (in production, use proper vocabulary mapping).
+    # crc32 is stable across runs, unlike hash(), which is salted per process.
+    token_ids = np.fromiter(
+        (zlib.crc32(token.encode("utf-8")) % 10000 for token in tokens),  # Limit to 10000 dimensions
+        dtype=np.int64,
+        count=len(tokens),
+    )
+    # Term frequencies in one pass; repeated tokens add up instead of duplicating indices
+    counts = np.bincount(token_ids, minlength=10000)
+    sparse_indices = np.flatnonzero(counts)
+    sparse_values = counts[sparse_indices].astype(np.float32)
 
     # Query with sparse vector for lexical/keyword matching
     try:
         # Note: This requires your index to be configured for sparse vectors
         # or hybrid search (dense + sparse)
-        results = index.query(
+        results = _INDEX.query(
             namespace=namespace,
-            sparse_vector={"indices": sparse_indices, "values": sparse_values},
+            sparse_vector={"indices": sparse_indices.tolist(), "values": sparse_values.tolist()},
             top_k=top_k,
             include_metadata=True,
         )
@@ -61,16 +80,12 @@ def lexical_search(query, top_k=10):
 
         # Alternative: Use metadata filtering for keyword search
         # This searches for keywords in metadata fields
-        from sentence_transformers import SentenceTransformer
-
-        model = SentenceTransformer(os.getenv("TRANSFORMER_MODEL"))
-
         # Create a dummy embedding for the query structure
-        query_embedding = model.encode(query)
+        query_embedding = _get_model().encode(query, normalize_embeddings=True)
 
         # Search with metadata filter for text containing keywords
         # Adjust field name based on your metadata structure
-        results = index.query(
+        results = _INDEX.query(
             namespace=namespace,
             vector=query_embedding.tolist(),
             top_k=top_k,
@@ -96,13 +111,16 @@ if __name__ == "__main__":
     print("-" * 50)
 
     if hasattr(results, "matches") and results.matches:
+        # Build the listing and write it once instead of a print per line
+        lines = []
         for i, match in enumerate(results.matches, 1):
-            print(f"\n{i}. Score: {match.score:.4f}")
-            print(f"   ID: {match.id}")
+            lines.append(f"\n{i}. Score: {match.score:.4f}")
+            lines.append(f"   ID: {match.id}")
             if match.metadata:
                 # Show first 200 chars of text if available
                 text = match.metadata.get("text", "")
                 if text:
-                    print(f"   Text: {text[:200]}...")
+                    lines.append(f"   Text: {text[:200]}...")
+        sys.stdout.write("\n".join(lines) + "\n")
     else:
         print("No results found")
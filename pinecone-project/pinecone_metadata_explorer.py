@@ -4,15 +4,38 @@ from collections import defaultdict, Counter
 from dotenv import load_dotenv
 from pinecone import Pinecone
 
+# Pinecone's top_k ceiling for queries that return metadata
+MAX_METADATA_TOP_K = 1000
+
+# Read once at import rather than in every call
+load_dotenv()
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+
+
+def sample_metadata(index, namespace, sample_size):
+    """
+    Return the metadata of up to sample_size vectors from one query.
+    Unlike list + fetch, no vector values come back over the wire.
+    """
+    sample_size = min(sample_size, MAX_METADATA_TOP_K)
+    dimension = index.describe_index_stats().dimension
+    # Any non-zero probe works; all-zero vectors are rejected on cosine indexes
+    result = index.query(
+        vector=[1.0] * dimension,
+        top_k=sample_size,
+        namespace=namespace,
+        include_values=False,
+        include_metadata=True,
+    )
+    return [match.metadata for match in result.matches]
+
 
 def explore_metadata_values(namespace="__default__", sample_size=1000):
     """
     Explore and list all available metadata keys and their values from a Pinecone index.
     This helps understand the structure and content of your vector database.
     """
-    load_dotenv()
-
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    pc = Pinecone(api_key=PINECONE_API_KEY)
     index = pc.Index("multimodal-search-v2")
 
     # Get index statistics
@@ -31,7 +54,7 @@ def explore_metadata_values(namespace="__default__", sample_size=1000):
 
     # Sample vectors to analyze metadata
     print("=== METADATA EXPLORATION ===")
-    print(f"Sampling up to {sample_size} vectors to analyze metadata...\n")
+    print(f"Sampling up to {min(sample_size, MAX_METADATA_TOP_K)} vectors to analyze metadata...\n")
 
     # Collect metadata from sample vectors
     metadata_keys = set()
@@ -41,62 +64,23 @@ def explore_metadata_values(namespace="__default__", sample_size=1000):
     vector_count = 0
 
     try:
-        # List vectors with pagination to get a sample
-        pagination_token = None
-        collected_samples = 0
-
-        while collected_samples < sample_size:
-            try:
-                # Get a batch of vector IDs
-                if pagination_token:
-                    result = index.list_paginated(
-                        namespace=namespace,
-                        limit=min(100, sample_size - collected_samples),
-                        pagination_token=pagination_token,
-                    )
-                else:
-                    result = index.list_paginated(
-                        namespace=namespace,
-                        limit=min(100, sample_size - collected_samples),
-                    )
-
-                if not result.vectors:
-                    break
-
-                # Get the actual vector data with metadata
-                vector_ids = [v.id for v in result.vectors]
-                fetch_result = index.fetch(ids=vector_ids, namespace=namespace)
-
-                # Analyze metadata from fetched vectors
-                for vector_id, vector_data in fetch_result.vectors.items():
-                    if vector_data.metadata:
-                        vector_count += 1
-                        for key, value in vector_data.metadata.items():
-                            metadata_keys.add(key)
-                            metadata_types[key].add(type(value).__name__)
-
-                            # Store sample values (limit to avoid memory issues)
-                            if len(metadata_samples[key]) < 20:
-                                metadata_samples[key].append(value)
-
-                            # For string values, collect unique values (up to a limit)
-                            if isinstance(value, (str, int, float, bool)):
-                                if (
-                                    len(metadata_values[key]) < 50
-                                ):  # Limit unique values stored
-                                    metadata_values[key].add(str(value))
-
-                collected_samples += len(vector_ids)
-
-                # Check for pagination
-                if hasattr(result.pagination, "next") and result.pagination.next:
-                    pagination_token = result.pagination.next
-                else:
-                    break
-
-            except Exception as e:
-                print(f"Error during pagination: {e}")
-                break
+        for metadata in sample_metadata(index, namespace, sample_size):
+            if metadata:
+                vector_count += 1
+                for key, value in metadata.items():
+                    metadata_keys.add(key)
+                    metadata_types[key].add(type(value).__name__)
+
+                    # Store sample values (limit to avoid memory issues)
+                    if len(metadata_samples[key]) < 20:
+                        metadata_samples[key].append(value)
+
+                    # For string values, collect unique values (up to a limit)
+                    if isinstance(value, (str, int, float, bool)):
+                        if (
+                            len(metadata_values[key]) < 50
+                        ):  # Limit unique values stored
+                            metadata_values[key].add(str(value))
 
     except Exception as e:
         print(f"Error exploring metadata: {e}")
@@ -155,9 +139,7 @@ def get_specific_metadata_values(metadata_key, namespace="__default__", limit=10
     Get all unique values for a specific metadata key.
     Useful for exploring categorical fields in detail.
     """
-    load_dotenv()
-
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    pc = Pinecone(api_key=PINECONE_API_KEY)
     index = pc.Index("semantic-search-demo")
 
     print(f"=== VALUES FOR METADATA KEY: '{metadata_key}' ===\n")
@@ -167,44 +149,13 @@ def get_specific_metadata_values(metadata_key, namespace="__default__", limit=10
 
     try:
         # Sample vectors to find values for the specific key
-        pagination_token = None
         processed = 0
-
-        while processed < limit:
-            try:
-                if pagination_token:
-                    result = index.list_paginated(
-                        namespace=namespace,
-                        limit=min(50, limit - processed),
-                        pagination_token=pagination_token,
-                    )
-                else:
-                    result = index.list_paginated(
-                        namespace=namespace, limit=min(50, limit - processed)
-                    )
-
-                if not result.vectors:
-                    break
-
-                vector_ids = [v.id for v in result.vectors]
-                fetch_result = index.fetch(ids=vector_ids, namespace=namespace)
-
-                for vector_id, vector_data in fetch_result.vectors.items():
-                    if vector_data.metadata and metadata_key in vector_data.metadata:
-                        value = vector_data.metadata[metadata_key]
-                        values.add(str(value))
-                        value_counts[str(value)] += 1
-
-                processed += len(vector_ids)
-
-                if hasattr(result.pagination, "next") and result.pagination.next:
-                    pagination_token = result.pagination.next
-                else:
-                    break
-
-            except Exception as e:
-                print(f"Error during pagination: {e}")
-                break
+        for metadata in sample_metadata(index, namespace, limit):
+            processed += 1
+            if metadata and metadata_key in metadata:
+                value = metadata[metadata_key]
+                values.add(str(value))
+                value_counts[str(value)] += 1
 
     except Exception as e:
         print(f"Error getting values for key '{metadata_key}': {e}")
@@ -1,8 +1,21 @@
 #!/usr/bin/env python3
 import os
+import sys
 from dotenv import load_dotenv
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from model_loader import cap_query_length, load_model, pin_torch_threads, query_encoder
+from pinecone.grpc import PineconeGRPC as Pinecone
+
+pin_torch_threads()
+
+
+# Loaded once per process instead of on every search
+load_dotenv()
+_PC = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+_INDEX = _PC.Index("multimodal-search-v2")
+_MODEL = load_model(os.getenv("TRANSFORMER_MODEL") or "all-MiniLM-L6-v2")
+cap_query_length(_MODEL)
+# Repeated queries skip the model entirely
+_encode_cached = query_encoder(_MODEL)
 
 
 def metadata_filter_search(query, metadata_filter, top_k=10):
@@ -10,18 +23,13 @@ def metadata_filter_search(query, metadata_filter, top_k=10):
     Search Pinecone using vector similarity with metadata filtering.
     This combines semantic search with metadata constraints.
     """
-    load_dotenv()
-
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index("multimodal-search-v2")
-    model = SentenceTransformer(os.getenv("TRANSFORMER_MODEL"))
     namespace = "__default__"
 
     # Encode the query into a vector
-    query_embedding = model.encode(query)
+    query_embedding = _encode_cached(query)
 
     # Query with metadata filter
-    results = index.query(
+    results = _INDEX.query(
         namespace=namespace,
         vector=query_embedding.tolist(),
         top_k=top_k,
@@ -58,15 +66,18 @@ if __name__ == "__main__":
     print("-" * 50)
 
     if results.matches:
+        # Build the listing and write it once instead of a print per line
+        lines = []
         for i, match in enumerate(results.matches, 1):
-            print(f"\n{i}. Score: {match.score:.4f}")
-            print(f"   ID: {match.id}")
+            lines.append(f"\n{i}. Score: {match.score:.4f}")
+            lines.append(f"   ID: {match.id}")
             if match.metadata:
-                print("   Metadata:")
+                lines.append("   Metadata:")
                 for key, value in match.metadata.items():
                     # Truncate long text values for display
                     if isinstance(value, str) and len(value) > 100:
                         value = value[:100] + "..."
-                    print(f"     - {key}: {value}")
+                    lines.append(f"     - {key}: {value}")
+        sys.stdout.write("\n".join(lines) + "\n")
     else:
         print("No results found")
@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 import os
+import sys
 from dotenv import load_dotenv
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from model_loader import cap_query_length, load_model, pin_torch_threads, query_encoder
+from pinecone.grpc import PineconeGRPC as Pinecone
 
+pin_torch_threads()
 
-def search_pinecone(query, top_k=10):
-    load_dotenv()
 
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index("multimodal-search-v2")
-    model = SentenceTransformer(os.getenv("TRANSFORMER_MODEL"))
+# Loaded once per process instead of on every search
+load_dotenv()
+_PC = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+_INDEX = _PC.Index("multimodal-search-v2")
+_MODEL = load_model(os.getenv("TRANSFORMER_MODEL") or "all-MiniLM-L6-v2")
+cap_query_length(_MODEL)
+# Repeated queries skip the model entirely
+_encode_cached = query_encoder(_MODEL)
+
+
+def search_pinecone(query, top_k=10):
     namespace = "__default__"
     # Encode and search
-    query_embedding = model.encode(query)
+    query_embedding = _encode_cached(query)
 
-    results = index.query(
+    results = _INDEX.query(
         namespace=namespace,
         vector=query_embedding.tolist(),
         top_k=top_k,
@@ -30,7 +38,7 @@ query = "what is the transport layer"
 if __name__ == "__main__":
     # Example usage
     results = search_pinecone(query, top_k=3)
-    for match in results.matches:
-        print(
-            f"Score: {match['score']:.4f} - {match['metadata'].get('text', '')[:100]}..."
-        )
+    sys.stdout.write("".join(
+        f"Score: {match['score']:.4f} - {match['metadata'].get('text', '')[:100]}...\n"
+        for match in results.matches
+    ))
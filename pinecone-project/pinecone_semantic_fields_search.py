@@ -1,8 +1,30 @@
 #!/usr/bin/env python3
 import os
+import sys
+from functools import lru_cache
 from dotenv import load_dotenv
 from pinecone import Pinecone
 
+# Read once at import rather than on every search
+load_dotenv()
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+TRANSFORMER_MODEL = os.getenv("TRANSFORMER_MODEL")
+
+
+@lru_cache(maxsize=None)
+def _get_index(name):
+    """Connect once per index; later searches reuse the client's connection pool."""
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    return pc.Index(name)
+
+
+@lru_cache(maxsize=None)
+def _get_model():
+    """Load the dense model on first use; only the fallback path needs it."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(TRANSFORMER_MODEL)
+
 
 def semantic_search_with_fields(query_text, fields=None, top_k=10):
     """
@@ -13,10 +35,7 @@ def semantic_search_with_fields(query_text, fields=None, top_k=10):
     Note: This requires your Pinecone index to be configured with an
     embedding model for automatic text-to-vector conversion.
     """
-    load_dotenv()
-
-    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-    index = pc.Index("multimodal-search-v2")
+    index = _get_index("multimodal-search-v2")
     namespace = "__default__"
 
     # Use Pinecone's search method with text input
@@ -36,12 +55,7 @@ def semantic_search_with_fields(query_text, fields=None, top_k=10):
         print("\nFalling back to manual embedding approach...")
 
         # Fallback: Use manual embedding with sentence transformers
-        from sentence_transformers import SentenceTransformer
-
-        model = SentenceTransformer(os.getenv("TRANSFORMER_MODEL"))
-
-        # Encode the query
-        query_embedding = model.encode(query_text)
+        query_embedding = _get_model().encode(query_text, normalize_embeddings=True)
 
         # Query with vector
         results = index.query(
@@ -54,13 +68,14 @@ def semantic_search_with_fields(query_text, fields=None, top_k=10):
 
         # If specific fields were requested, filter the metadata
         if fields and hasattr(results, "matches"):
+            # Deduplicated once; lookups then walk the few requested fields
+            # instead of every metadata key, keeping the requested order
+            wanted = list(dict.fromkeys(fields))
             for match in results.matches:
-                if match.metadata:
+                metadata = match.metadata
+                if metadata:
                     # Filter metadata to only requested fields
-                    filtered_metadata = {
-                        k: v for k, v in match.metadata.items() if k in fields
-                    }
-                    match.metadata = filtered_metadata
+                    match.metadata = {k: metadata[k] for k in wanted if k in metadata}
 
         return results
 
@@ -73,16 +88,19 @@ def display_results(results, query, fields=None):
     print("-" * 50)
 
     if hasattr(results, "matches") and results.matches:
+        # Build the listing and write it once instead of a print per line
+        lines = []
         for i, match in enumerate(results.matches, 1):
-            print(f"\n{i}. Score: {match.score:.4f}")
-            print(f"   ID: {match.id}")
+            lines.append(f"\n{i}. Score: {match.score:.4f}")
+            lines.append(f"   ID: {match.id}")
             if match.metadata:
-                print("   Metadata:")
+                lines.append("   Metadata:")
                 for key, value in match.metadata.items():
                     # Truncate long text values for display
                     if isinstance(value, str) and len(value) > 150:
                         value = value[:150] + "..."
-                    print(f"     - {key}: {value}")
+                    lines.append(f"     - {key}: {value}")
+        sys.stdout.write("\n".join(lines) + "\n")
     else:
         print("No results found")
 
@@ -1,39 +1,102 @@
 #!/usr/bin/env python3
 import time
+from collections import deque
+import numpy as np
+from pinecone.exceptions import PineconeException
+from tenacity import retry, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_exponential
+from query_cache import INGEST_TAG
 
-def upload_documents_to_pinecone(documents, index_name, pc):
-    """Upload documents to Pinecone index in batches"""
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(min=0.5, max=8),
+    retry=retry_if_exception_type(PineconeException)
+)
+def _upsert_one(index, batch):
+    """Upload one batch, backing off only when Pinecone pushes back (e.g. 429)."""
+    return index.upsert(vectors=batch)
+
+
+@retry(
+    stop=stop_after_attempt(6),
+    wait=wait_exponential(min=0.5, max=8),
+    retry=retry_if_result(lambda stats: stats is None),
+    retry_error_callback=lambda state: None
+)
+def _wait_for_count(index, expected):
+    """Poll index stats until at least expected vectors are visible, or give up."""
+    stats = index.describe_index_stats()
+    return stats if stats.total_vector_count >= expected else None
+
+
+def upload_documents_to_pinecone(documents, index_name, pc, max_in_flight=8, batch_size=200,
+                                 max_requests_per_second=100):
+    """Upload an iterable of embedded documents to Pinecone index in batches"""
     # Connect to index and upload in batches
     index = pc.Index(index_name)
 
-    # Prepare vectors
-    vectors_to_upsert = []
+    # pc is the gRPC client, so upserts return futures and batches pipeline;
+    # waiting on the oldest past max_in_flight keeps memory bounded
+    in_flight = deque()
+    batch_number = 0
+    uploaded = 0
+    # Sends are spaced to stay under Pinecone's per-namespace request rate
+    send_interval = 1 / max_requests_per_second
+    next_send = time.monotonic()
+
+    def settle(future, batch):
+        nonlocal uploaded
+        try:
+            future.result()
+        except PineconeException as e:
+            print(f"Batch of {len(batch)} vectors failed, retrying: {e}")
+            _upsert_one(index, batch)
+        uploaded += len(batch)
+
+    def send(batch):
+        nonlocal batch_number, next_send
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_send = max(next_send, time.monotonic()) + send_interval
+        batch_number += 1
+        print(f"Uploading batch {batch_number}: {len(batch)} vectors")
+        in_flight.append((index.upsert(vectors=batch, async_req=True), batch))
+        if len(in_flight) >= max_in_flight:
+            settle(*in_flight.popleft())
+
+    # Vectors are built as documents arrive, so only in-flight batches are held
+    print(f"Uploading vectors in batches of {batch_size}...")
+    batch = []
     for doc in documents:
-        vector_data = (
+        batch.append((
             doc["id"],
-            doc["embedding"],
+            # Embeddings stay as float32 arrays until the batch is sent
+            np.asarray(doc["embedding"], dtype=np.float32).tolist(),
             {
                 "text": doc["text"],
                 "filename": doc["filename"],
-                "category": doc["category"]
+                "category": doc["category"],
+                # Lets later runs spot chunks they have already embedded
+                "content_hash": doc.get("content_hash", ""),
             }
-        )
-        vectors_to_upsert.append(vector_data)
-
-    # Upload in batches
-    print(f"Uploading {len(vectors_to_upsert)} vectors in batches...")
-    batch_size = 10
-    for i in range(0, len(vectors_to_upsert), batch_size):
-        batch = vectors_to_upsert[i:i+batch_size]
-        print(f"Uploading batch {i//batch_size + 1}: {len(batch)} vectors")
-        index.upsert(vectors=batch)
-        time.sleep(2)
+        ))
+        if len(batch) == batch_size:
+            send(batch)
+            batch = []
+    if batch:
+        send(batch)
+    while in_flight:
+        settle(*in_flight.popleft())
 
+    # Verify upload; indexing is eventually consistent, so poll rather than
+    # sleeping a fixed interval. Re-upserted ids can keep the count lower.
     print("Upload complete! Waiting for indexing...")
-    time.sleep(10)
-
-    # Verify upload
-    stats = index.describe_index_stats()
+    stats = _wait_for_count(index, uploaded) or index.describe_index_stats()
     print(f"Total vectors in index: {stats.total_vector_count}")
 
+    # Saved query caches are tagged with this stamp, so they are dropped once
+    # the contents change even when the vector count doesn't
+    pc.configure_index(index_name, tags={INGEST_TAG: str(time.time_ns())})
+
     return index
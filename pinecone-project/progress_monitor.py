@@ -2,9 +2,9 @@
 import os
 import time
 from dotenv import load_dotenv
-from pinecone import Pinecone
+from pinecone.grpc import PineconeGRPC as Pinecone
 
-def monitor_progress():
+def monitor_progress(min_interval=2, max_interval=60):
     """Monitor indexing progress in real-time."""
     load_dotenv()
     api_key = os.getenv("PINECONE_API_KEY")
@@ -17,6 +17,9 @@ def monitor_progress():
     try:
         index = pc.Index(index_name)
         last_count = 0
+        # Poll quickly while the count climbs and back off while it is idle,
+        # so a finished upload doesn't keep spending stats requests
+        interval = min_interval
 
         while True:
             try:
@@ -27,9 +30,13 @@ def monitor_progress():
                 # Calculate rate if we have previous data
                 if last_count > 0:
                     rate = current_count - last_count
-                    rate_text = f"(+{rate}/10s)" if rate > 0 else "(no change)"
+                    rate_text = f"(+{rate}/{interval}s)" if rate > 0 else "(no change)"
                 else:
                     rate_text = ""
+                if current_count != last_count:
+                    interval = min_interval
+                else:
+                    interval = min(interval * 2, max_interval)
 
                 # Show progress
                 print(f"📊 Vectors: {current_count:,} {rate_text}")
@@ -38,11 +45,12 @@ def monitor_progress():
                 print("-" * 30)
 
                 last_count = current_count
-                time.sleep(10)  # Check every 10 seconds
+                time.sleep(interval)
 
             except Exception as e:
                 print(f"❌ Error checking stats: {e}")
-                time.sleep(10)
+                interval = min(interval * 2, max_interval)
+                time.sleep(interval)
 
     except KeyboardInterrupt:
         print("\n👋 Monitoring stopped")
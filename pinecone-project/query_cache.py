@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import atexit
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import orjson
+
+CACHE_DIR = ".query_cache"
+# Index tag that upload_documents_to_pinecone stamps after every ingest
+INGEST_TAG = "ingested_at"
+
+
+def ingest_tag(pc, index_name):
+    """
+    The index's last-ingest stamp, for use as a cache tag. Re-upserting edited
+    chunks under the same ids leaves the vector count unchanged, so the count
+    can't tell a saved cache has gone stale. None if the index was never stamped.
+    """
+    tags = getattr(pc.describe_index(index_name), "tags", None) or {}
+    return tags.get(INGEST_TAG)
+
+
+def normalize_query(text):
+    """Case- and whitespace-insensitive form of a query, used as an exact cache key."""
+    return " ".join(text.lower().split())
+
+
+class SemanticQueryCache:
+    """
+    Results of recent queries, looked up by embedding similarity so that
+    rephrasings of an earlier question skip the Pinecone round trip.
+
+    With a name and a tag, the cache is loaded from and saved to CACHE_DIR so
+    a new session starts warm. tag must change whenever the index contents do
+    (see ingest_tag); a saved cache with a different tag is ignored, and
+    without a tag nothing is saved. Embeddings must be unit-norm
+    (normalize_embeddings=True), so similarity is a plain dot product.
+
+    The threshold suits sentence-embedding models. CLIP text embeddings of
+    unrelated questions sit much closer together; use ExactQueryCache there.
+    """
+
+    def __init__(self, dimension, size=256, threshold=0.95, name=None, tag=None):
+        self.size = size
+        self.threshold = threshold
+        self.tag = tag
+        self._vectors = np.zeros((size, dimension), dtype=np.float32)
+        self._results = OrderedDict()
+        self._path = os.path.join(CACHE_DIR, name) if name and tag is not None else None
+        # Concurrent searches (e.g. asyncio.to_thread batches) share one cache
+        self._lock = threading.Lock()
+        if self._path:
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, embedding, top_k):
+        """Return results of a near-identical query that fetched at least top_k matches."""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            return self._lookup(embedding, top_k)
+
+    def _lookup(self, embedding, top_k):
+        if not self._results:
+            return None
+        # Rows are filled in order and evicted rows are reused, so the first
+        # len(cache) rows are exactly the live entries
+        scores = self._vectors[:len(self._results)] @ embedding
+        row = int(np.argmax(scores))
+        cached_top_k, results = self._results[row]
+        if scores[row] < self.threshold or cached_top_k < top_k:
+            return None
+        self._results.move_to_end(row)
+        return results
+
+    def put(self, embedding, top_k, results):
+        """Remember a query's results, evicting the least recently used entry when full."""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if len(self._results) < self.size:
+                row = len(self._results)
+            else:
+                row, _ = self._results.popitem(last=False)
+            self._vectors[row] = embedding
+            self._results[row] = (top_k, results)
+
+    def save(self):
+        """Write live entries, oldest first, so a reload keeps the LRU order."""
+        if not self._results:
+            return
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        rows = list(self._results)
+        np.save(f"{self._path}.npy", self._vectors[rows])
+        with open(f"{self._path}.json", "wb") as f:
+            f.write(orjson.dumps({"tag": self.tag, "results": list(self._results.values())}))
+
+    def _load(self):
+        try:
+            vectors = np.load(f"{self._path}.npy")
+            with open(f"{self._path}.json", "rb") as f:
+                saved = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if saved["tag"] != self.tag or vectors.shape[1:] != self._vectors.shape[1:]:
+            return
+        for vector, (top_k, results) in zip(vectors[-self.size:], saved["results"][-self.size:]):
+            self.put(vector, top_k, results)
+
+
+class ExactQueryCache:
+    """
+    Results of recent queries, looked up by their normalized text, so only a
+    repeat of the same question (up to case and whitespace) is a hit. For
+    models like CLIP, whose text embeddings are too tightly clustered for a
+    similarity threshold to separate different questions. Persistence and
+    tags work as in SemanticQueryCache.
+    """
+
+    def __init__(self, size=256, name=None, tag=None):
+        self.size = size
+        self.tag = tag
+        self._results = OrderedDict()
+        self._path = os.path.join(CACHE_DIR, name) if name and tag is not None else None
+        self._lock = threading.Lock()
+        if self._path:
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, query, top_k):
+        """Return results of the same query that fetched at least top_k matches."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None or entry[0] < top_k:
+                return None
+            self._results.move_to_end(key)
+            return entry[1]
+
+    def put(self, query, top_k, results):
+        """Remember a query's results, evicting the least recently used entry when full."""
+        key = normalize_query(query)
+        with self._lock:
+            self._results[key] = (top_k, results)
+            self._results.move_to_end(key)
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+    def save(self):
+        """Write live entries, oldest first, so a reload keeps the LRU order."""
+        if not self._results:
+            return
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        entries = [[key, top_k, results] for key, (top_k, results) in self._results.items()]
+        with open(f"{self._path}.json", "wb") as f:
+            f.write(orjson.dumps({"tag": self.tag, "exact": entries}))
+
+    def _load(self):
+        try:
+            with open(f"{self._path}.json", "rb") as f:
+                saved = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if saved.get("tag") != self.tag or "exact" not in saved:
+            return
+        for key, top_k, results in saved["exact"][-self.size:]:
+            self._results[key] = (top_k, results)
@@ -4,28 +4,85 @@ Interactive query testing for your Obsidian knowledge base
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 from dotenv import load_dotenv
-from pinecone import Pinecone
+from pinecone.grpc import PineconeGRPC as Pinecone
 from sentence_transformers import SentenceTransformer
-from pinecone_search import search_obsidian_knowledge_base
+from embed_cache import CachedEncoder
+from model_loader import query_encoder
+from query_cache import SemanticQueryCache, ingest_tag
+
+# Read once at import rather than in every session
+load_dotenv()
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+MODEL = os.getenv("TRANSFORMER")
+
+
+@lru_cache(maxsize=None)
+def _get_model(name):
+    """Load each model once per process, whichever session asks first."""
+    # Embeddings persist on disk, so queries from earlier sessions skip the model
+    return CachedEncoder(SentenceTransformer(name), name)
+
+
+@lru_cache(maxsize=None)
+def _get_index(name):
+    """Connect once per index; later calls reuse the client's connection pool."""
+    return Pinecone(api_key=PINECONE_API_KEY).Index(name)
+
+
+@lru_cache(maxsize=None)
+def _encoder(model):
+    """One memoized query encoder per model; repeats skip the model entirely."""
+    return query_encoder(model)
+
+
+def search_obsidian_knowledge_base(query, model, index, top_k=5, cache=None):
+    """Search the index, reusing results of a near-identical earlier query when cached"""
+    query_embedding = _encoder(model)(query)
+    return search_by_embedding(query_embedding, index, top_k, cache)
+
+
+def search_by_embedding(query_embedding, index, top_k=5, cache=None):
+    """Search the index with an already encoded query"""
+    if cache is not None:
+        cached = cache.get(query_embedding, top_k)
+        if cached is not None:
+            return {"matches": cached["matches"][:top_k]}
+
+    response = index.query(vector=query_embedding.tolist(), top_k=top_k, include_metadata=True)
+    # Plain dicts so results can be cached and saved between sessions
+    results = {
+        "matches": [
+            {"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})}
+            for match in response.matches
+        ]
+    }
+    if cache is not None:
+        cache.put(query_embedding, top_k, results)
+    return results
 
 
 def interactive_query_session():
     """Run interactive query session"""
     # Setup
-    load_dotenv()
-    api_key = os.getenv("PINECONE_API_KEY")
     index_name = "multimodal-search-v2"
-    MODEL = os.getenv("TRANSFORMER")
     # Initialize components
     print("🔄 Loading model and connecting to Pinecone...")
-    model = SentenceTransformer(MODEL)
-    pc = Pinecone(api_key=api_key)
-    index = pc.Index(index_name)
+    model = _get_model(MODEL)
+    index = _get_index(index_name)
 
     # Get index stats
     stats = index.describe_index_stats()
     print(f"✅ Connected to index with {stats.total_vector_count} documents")
+    # Repeated or rephrased queries skip the round trip, also across sessions
+    cache = SemanticQueryCache(
+        model.get_sentence_embedding_dimension(),
+        name=f"{index_name}-{MODEL.replace('/', '--')}",
+        tag=ingest_tag(Pinecone(api_key=PINECONE_API_KEY), index_name),
+    )
 
     print("\n" + "=" * 60)
     print("INTERACTIVE OBSIDIAN SEARCH")
@@ -63,13 +120,17 @@ def interactive_query_session():
             print(f"\n🔍 Searching for: '{query}' (top {top_k})")
             print("=" * 50)
 
-            results = search_obsidian_knowledge_base(query, model, index, top_k)
+            results = search_obsidian_knowledge_base(query, model, index, top_k, cache)
 
             # Analyze results
             if results["matches"]:
-                scores = [match["score"] for match in results["matches"]]
-                avg_score = sum(scores) / len(scores)
-                max_score = max(scores)
+                scores = np.fromiter(
+                    (match["score"] for match in results["matches"]),
+                    dtype=np.float32,
+                    count=len(results["matches"]),
+                )
+                avg_score = scores.mean()
+                max_score = scores.max()
 
                 print(f"\n📊 Score Analysis:")
                 print(f"   Best match: {max_score:.4f}")
@@ -98,13 +159,9 @@ def test_predefined_queries():
     """Test a set of predefined queries to understand search behavior"""
 
     # Setup (same as above)
-    load_dotenv()
-    api_key = os.getenv("PINECONE_API_KEY")
     index_name = "semantic-search-demo"
-    MODEL = os.getenv("TRANSFORMER")
-    model = SentenceTransformer(MODEL)
-    pc = Pinecone(api_key=api_key)
-    index = pc.Index(index_name)
+    model = _get_model(MODEL)
+    index = _get_index(index_name)
 
     # Predefined test queries
     test_queries = ["HTTPie"]
@@ -114,11 +171,15 @@ def test_predefined_queries():
     print("=" * 60)
     print("Testing predefined queries to understand search patterns...")
 
-    for i, query in enumerate(test_queries, 1):
+    # One batched forward pass for all queries, then the searches in parallel
+    embeddings = model.encode(test_queries, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        all_results = list(pool.map(lambda embedding: search_by_embedding(embedding, index, top_k=3), embeddings))
+
+    for i, (query, results) in enumerate(zip(test_queries, all_results), 1):
         print(f"\n🔍 Test {i}: '{query}'")
         print("-" * 40)
 
-        results = search_obsidian_knowledge_base(query, model, index, top_k=3)
         for j, match in enumerate(results["matches"], 1):
             print(f"  {j}. Score: {match['score']:.4f}")
             print(f"     File: {match['metadata'].get('source', 'Unknown')}")
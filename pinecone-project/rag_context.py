@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+MAX_CONTEXT_CHARS = 4000  # Prompt budget for retrieved text; input tokens drive LLM latency
+
+
+def clip_contexts(contexts, max_chars=MAX_CONTEXT_CHARS):
+    """Keep the best-scoring distinct contexts that fit in max_chars of prompt."""
+    kept, used = [], 0
+    for context in dict.fromkeys(contexts):  # Exact duplicate chunks add nothing
+        if used + len(context) > max_chars:
+            if not kept:
+                kept.append(context[:max_chars])  # Never send an empty context
+            break
+        kept.append(context)
+        used += len(context)
+    return kept
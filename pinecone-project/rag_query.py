@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
+import asyncio
 import os
+import sys
+import requests
+import torch
 from dotenv import load_dotenv
-from pinecone import Pinecone
+from pinecone.grpc import PineconeGRPC as Pinecone
 from sentence_transformers import SentenceTransformer
+from embed_cache import CachedEncoder
+from model_loader import best_device, query_encoder
+from query_cache import ExactQueryCache, ingest_tag
+from rag_context import clip_contexts
 import openai
 
 # Configuration
@@ -14,23 +22,48 @@ index_name = "multimodal-search-v2"
 # Initialize
 pc = Pinecone(api_key=api_key)
 index = pc.Index(index_name)
-model = SentenceTransformer("clip-ViT-B-32")
+# Query encoding runs on the GPU when there is one; TF32 matmuls for any fp32 work
+torch.set_float32_matmul_precision("high")
+device = best_device()
+model = SentenceTransformer("clip-ViT-B-32", device=device)
+if device == "cuda":
+    model.half()  # Questions are text-only, so fp16 weights are safe here
+# Questions asked in any earlier session skip the model
+model = CachedEncoder(model, "clip-ViT-B-32")
+# Repeated questions reuse earlier retrievals. Keyed by text, not embedding
+# similarity: CLIP embeds different questions too close together to tell
+# apart. The ingest stamp invalidates the saved cache after every upload.
+query_cache = ExactQueryCache(name="rag_query", tag=ingest_tag(pc, index_name))
 
 # Set up OpenAI (or you can use Anthropic's Claude API)
 openai.api_key = openai_api_key
+# One kept-alive connection pool shared by every thread, instead of a
+# session per thread, sized for ask_questions' concurrency
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32))
+openai.requestssession = _session
+
+# Repeated questions in this session skip even the disk cache
+_encode_cached = query_encoder(model)
 
 def search_knowledge_base(question, top_k=5):
     """Search your knowledge base for relevant context."""
     print(f"🔍 Searching for: {question}")
 
+    cached = query_cache.get(question, top_k)
+    if cached is not None:
+        contexts, sources = cached
+        return contexts[:top_k], sources[:top_k]
+
     # 1. Embed the question
-    query_embedding = model.encode(question).tolist()
+    query_embedding = _encode_cached(question)
 
     # 2. Search your index
     results = index.query(
-        vector=query_embedding,
+        vector=query_embedding.tolist(),
         top_k=top_k,
-        include_metadata=True
+        include_metadata=True,
+        include_values=False,  # Only metadata is used; skip 512 floats per match
     )
 
     # 3. Extract context from results
@@ -45,13 +78,14 @@ def search_knowledge_base(question, top_k=5):
             'score': round(match.score, 3)
         })
 
+    query_cache.put(question, top_k, [contexts, sources])
     return contexts, sources
 
-def ask_llm(question, contexts):
-    """Send question + context to LLM for final answer."""
+def ask_llm(question, contexts, stream=True):
+    """Send question + context to LLM for final answer, printing it as it streams in."""
 
     # Build the prompt
-    context_text = "\n\n".join(contexts)
+    context_text = "\n\n".join(clip_contexts(contexts))
 
     prompt = f"""You are a helpful assistant that answers questions based on the provided context from the user's knowledge base.
 
@@ -77,13 +111,25 @@ Answer:"""
                 {"role": "user", "content": prompt}
             ],
             max_tokens=500,
-            temperature=0.1
+            temperature=0.1,
+            stream=stream
         )
 
-        return response.choices[0].message.content
+        if not stream:
+            return response.choices[0].message.content
+        parts = []
+        for chunk in response:
+            text = chunk.choices[0].delta.get("content") or ""
+            print(text, end="", flush=True)
+            parts.append(text)
+        print()
+        return "".join(parts)
 
     except Exception as e:
-        return f"Error calling LLM: {e}"
+        error = f"Error calling LLM: {e}"
+        if stream:
+            print(error)
+        return error
 
 def ask_question(question):
     """Complete RAG pipeline: retrieve + generate."""
@@ -96,15 +142,39 @@ def ask_question(question):
 
     # Step 2: Generate answer using LLM
     print(f"📚 Found {len(contexts)} relevant chunks")
+    print(f"\n🤖 Answer:")
     answer = ask_llm(question, contexts)
 
     # Step 3: Show sources
+    show_sources(sources)
+
+    return answer, sources
+
+def show_answer(answer, sources):
+    """Print an answer followed by its sources."""
     print(f"\n🤖 Answer:\n{answer}")
+    show_sources(sources)
+
+def show_sources(sources):
+    """Print the sources an answer was built from."""
     print(f"\n📖 Sources:")
     for i, source in enumerate(sources, 1):
         print(f"  {i}. {source['filename']} ({source['category']}) - Score: {source['score']}")
 
-    return answer, sources
+async def ask_questions(questions, concurrency=8):
+    """Run the RAG pipeline for several questions concurrently, returning (answer, sources) in order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(question):
+        async with semaphore:
+            # Search and the LLM call are both blocking, so they run on worker threads
+            contexts, sources = await asyncio.to_thread(search_knowledge_base, question)
+            if not contexts:
+                return "No relevant information found in your knowledge base.", sources
+            # Answers are printed in order once all are done, so none stream
+            return await asyncio.to_thread(ask_llm, question, contexts, False), sources
+
+    return await asyncio.gather(*(process(question) for question in questions))
 
 def interactive_mode():
     """Interactive Q&A session."""
@@ -129,6 +199,14 @@ def interactive_mode():
         print(f"{'='*50}\n")
 
 if __name__ == "__main__":
+    # Questions on the command line are answered as one concurrent batch
+    if len(sys.argv) > 1:
+        questions = sys.argv[1:]
+        for question, (answer, sources) in zip(questions, asyncio.run(ask_questions(questions))):
+            print(f"\n{'='*50}\n❓ {question}")
+            show_answer(answer, sources)
+        sys.exit()
+
     # Test with a sample question
     sample_question = "What is CockroachDB and how does it work?"
 
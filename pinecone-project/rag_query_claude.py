@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
+import asyncio
 import os
+import sys
+import httpx
+import torch
 from dotenv import load_dotenv
-from pinecone import Pinecone
+from pinecone.grpc import PineconeGRPC as Pinecone
 from sentence_transformers import SentenceTransformer
+from embed_cache import CachedEncoder
+from model_loader import best_device, query_encoder
+from query_cache import ExactQueryCache, ingest_tag
+from rag_context import clip_contexts
 import anthropic
 
 # Configuration
@@ -14,23 +22,48 @@ index_name = "multimodal-search-v2"
 # Initialize
 pc = Pinecone(api_key=api_key)
 index = pc.Index(index_name)
-model = SentenceTransformer("clip-ViT-B-32")
-
-# Set up Claude
-client = anthropic.Anthropic(api_key=claude_api_key)
-
-def search_knowledge_base(question, top_k=5):
+# Query encoding runs on the GPU when there is one; TF32 matmuls for any fp32 work
+torch.set_float32_matmul_precision("high")
+device = best_device()
+model = SentenceTransformer("clip-ViT-B-32", device=device)
+if device == "cuda":
+    model.half()  # Questions are text-only, so fp16 weights are safe here
+# Questions asked in any earlier session skip the model
+model = CachedEncoder(model, "clip-ViT-B-32")
+# Repeated questions reuse earlier retrievals. Keyed by text, not embedding
+# similarity: CLIP embeds different questions too close together to tell
+# apart. The ingest stamp invalidates the saved cache after every upload.
+query_cache = ExactQueryCache(name="rag_query_claude", tag=ingest_tag(pc, index_name))
+
+# Set up Claude; the async client serves batches of questions. Each keeps
+# one pool of kept-alive connections, sized for ask_questions' concurrency
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+client = anthropic.Anthropic(api_key=claude_api_key, http_client=httpx.Client(limits=HTTP_LIMITS))
+async_client = anthropic.AsyncAnthropic(
+    api_key=claude_api_key, http_client=httpx.AsyncClient(limits=HTTP_LIMITS)
+)
+
+# Repeated questions in this session skip even the disk cache
+_encode_cached = query_encoder(model)
+
+def search_knowledge_base(question, top_k=3):
     """Search your knowledge base for relevant context."""
     print(f"🔍 Searching for: {question}")
 
+    cached = query_cache.get(question, top_k)
+    if cached is not None:
+        contexts, sources = cached
+        return contexts[:top_k], sources[:top_k]
+
     # 1. Embed the question
-    query_embedding = model.encode(question).tolist()
+    query_embedding = _encode_cached(question)
 
     # 2. Search your index
     results = index.query(
-        vector=query_embedding,
+        vector=query_embedding.tolist(),
         top_k=top_k,
-        include_metadata=True
+        include_metadata=True,
+        include_values=False,  # Only metadata is used; skip 512 floats per match
     )
 
     # 3. Extract context from results
@@ -46,13 +79,13 @@ def search_knowledge_base(question, top_k=5):
             'score': round(match.score, 3)
         })
 
+    query_cache.put(question, top_k, [contexts, sources])
     return contexts, sources
 
-def ask_claude(question, contexts):
-    """Send question + context to Claude for final answer."""
-
-    # Build the prompt
-    context_text = "\n\n".join(contexts[:3])  # Limit to top 3 for token efficiency
+def build_prompt(question, contexts):
+    """Build the Claude prompt from a question and its retrieved contexts."""
+    # search_knowledge_base fetches only the top 3, for token efficiency
+    context_text = "\n\n".join(clip_contexts(contexts[:3]))
 
     prompt = f"""You are a helpful assistant answering questions based on the user's personal knowledge base.
 
@@ -69,14 +102,43 @@ Instructions:
 
 Answer:"""
 
+    return prompt
+
+def ask_claude(question, contexts):
+    """Send question + context to Claude, printing the answer as it streams in."""
+    prompt = build_prompt(question, contexts)
+
+    parts = []
     try:
-        response = client.messages.create(
+        with client.messages.stream(
             model="claude-3-5-sonnet-20241022",
             max_tokens=500,
             temperature=0.1,
             messages=[
                 {"role": "user", "content": prompt}
             ]
+        ) as stream:
+            for text in stream.text_stream:
+                print(text, end="", flush=True)
+                parts.append(text)
+        print()
+        return "".join(parts)
+
+    except Exception as e:
+        error = f"Error calling Claude: {e}"
+        print(error)
+        return error
+
+async def ask_claude_async(question, contexts):
+    """Async ask_claude, so several questions can wait on Claude at once."""
+    try:
+        response = await async_client.messages.create(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=500,
+            temperature=0.1,
+            messages=[
+                {"role": "user", "content": build_prompt(question, contexts)}
+            ]
         )
 
         return response.content[0].text
@@ -84,6 +146,18 @@ Answer:"""
     except Exception as e:
         return f"Error calling Claude: {e}"
 
+def show_answer(answer, sources):
+    """Print an answer followed by its sources."""
+    print(f"\n🤖 Claude's Answer:\n{answer}")
+    show_sources(sources)
+
+def show_sources(sources):
+    """Print the sources an answer was built from."""
+    print(f"\n📖 Sources:")
+    for i, source in enumerate(sources, 1):
+        file_type_emoji = "🖼️" if source['file_type'] == 'image' else "📄" if source['file_type'] == 'pdf' else "📝"
+        print(f"  {i}. {file_type_emoji} {source['filename']} ({source['category']}) - Score: {source['score']}")
+
 def ask_question(question):
     """Complete RAG pipeline: retrieve + generate."""
 
@@ -93,19 +167,30 @@ def ask_question(question):
     if not contexts:
         return "No relevant information found in your knowledge base."
 
-    # Step 2: Generate answer using Claude
+    # Step 2: Generate answer using Claude, shown as it is generated
     print(f"📚 Found {len(contexts)} relevant chunks")
+    print(f"\n🤖 Claude's Answer:")
     answer = ask_claude(question, contexts)
 
     # Step 3: Show sources
-    print(f"\n🤖 Claude's Answer:\n{answer}")
-    print(f"\n📖 Sources:")
-    for i, source in enumerate(sources, 1):
-        file_type_emoji = "🖼️" if source['file_type'] == 'image' else "📄" if source['file_type'] == 'pdf' else "📝"
-        print(f"  {i}. {file_type_emoji} {source['filename']} ({source['category']}) - Score: {source['score']}")
+    show_sources(sources)
 
     return answer, sources
 
+async def ask_questions(questions, concurrency=8):
+    """Run the RAG pipeline for several questions concurrently, returning (answer, sources) in order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(question):
+        async with semaphore:
+            # The gRPC search is blocking, so it runs on a worker thread
+            contexts, sources = await asyncio.to_thread(search_knowledge_base, question)
+            if not contexts:
+                return "No relevant information found in your knowledge base.", sources
+            return await ask_claude_async(question, contexts), sources
+
+    return await asyncio.gather(*(process(question) for question in questions))
+
 def interactive_mode():
     """Interactive Q&A session."""
     print("🧠 RAG System with Claude Ready! Ask questions about your knowledge base.")
@@ -142,6 +227,14 @@ sample_questions = [
 ]
 
 if __name__ == "__main__":
+    # Questions on the command line are answered as one concurrent batch
+    if len(sys.argv) > 1:
+        questions = sys.argv[1:]
+        for question, (answer, sources) in zip(questions, asyncio.run(ask_questions(questions))):
+            print(f"\n{'='*50}\n❓ {question}")
+            show_answer(answer, sources)
+        sys.exit()
+
     print("🚀 Testing RAG Pipeline with Claude...")
     print("\nSample questions you can try:")
     for i, q in enumerate(sample_questions, 1):
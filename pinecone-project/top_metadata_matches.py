@@ -1,7 +1,9 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from pinecone import Pinecone
+from pinecone.grpc import PineconeGRPC as Pinecone
 from sentence_transformers import SentenceTransformer
+from embed_cache import CachedEncoder
 
 
 load_dotenv()
@@ -12,20 +14,29 @@ QUERY = "amazon"
 top_k = 10
 
 
-def search_docs():
-    index_name = "multimodal-search-v2"
-    model = SentenceTransformer(MODEL)
-    pc = Pinecone(api_key=api_key)
-    index = pc.Index(index_name)
+@lru_cache(maxsize=None)
+def get_model():
+    """Load the model once per process; embeddings persist across runs on disk."""
+    return CachedEncoder(SentenceTransformer(MODEL), MODEL)
 
-    query_embedding = model.encode(query)
+
+@lru_cache(maxsize=None)
+def get_index(name):
+    """Connect once per index; later searches reuse the client's connection pool."""
+    return Pinecone(api_key=api_key).Index(name)
+
+
+def search_docs(query=QUERY):
+    model = get_model()
+    index = get_index("multimodal-search-v2")
+
+    query_embedding = model.encode(query, normalize_embeddings=True)
     results = index.query(
         vector=query_embedding.tolist(), top_k=top_k, include_metadata=True
     )
 
     print(f"Query: '{query}'")
     for i, match in enumerate(results["matches"], 1):
-        breakpoint()
         print(f"{i}. ID: {match['id']} (Score: {match['score']:.4f})")
         print(f"   File: {match['metadata'].get('filename', 'Unknown')}")
         print(f"   Text: {match['metadata'].get('text', 'No text')[:100]}")
@@ -37,7 +48,9 @@ def search_docs():
     # for id, vector in fetched["vectors"].items():
     #   print(f"ID: {id}, Metadata: {vector['metadata']}")
 
-    breakpoint()
+    # Inspect the results interactively with DEBUG=1
+    if os.getenv("DEBUG"):
+        breakpoint()
     return results
 
 